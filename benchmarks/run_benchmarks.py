@@ -0,0 +1,247 @@
+"""Benchmark deck generation throughput, output size and memory.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --preset quick --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json
+
+Each case renders a synthetic deck in a fresh process so peak RSS is
+measured per case. Results are written as JSON and, when a baseline is
+given, compared against it; regressions give a non-zero exit status.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import reportlab
+
+from components.card_data import CardData
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.card_renderer import CardRenderer
+from components.title_page_generator import TitlePageGenerator
+from components.flashcard_generator import FlashcardGenerator
+
+# (cards, categories, words per question)
+PRESETS = {
+    "quick": [(48, 12, 7), (500, 12, 7), (500, 40, 14)],
+    "full": [
+        (48, 12, 7),
+        (1000, 12, 7),
+        (1000, 40, 14),
+        (10000, 12, 7),
+        (10000, 200, 20),
+        (100000, 12, 7),
+    ],
+}
+
+WORDS = (
+    "how what why where which does did could would shape color leaf shell "
+    "feather bark stone seed wing nest home animal insect texture pattern "
+    "heavy light smooth bumpy old tiny big change nature clue secret"
+).split()
+
+
+class SyntheticDeck:
+    """Re-iterable (category, question) source with reproducible content."""
+
+    def __init__(self, card_count, category_count, question_words, seed=0):
+        self.card_count = card_count
+        self.question_words = question_words
+        self.seed = seed
+
+        # Use the styled categories first so both styled and default
+        # color schemes are exercised
+        known = list(StyleManager().category_colors)
+        extra_count = max(0, category_count - len(known))
+        extra = [f"Category {i}" for i in range(extra_count)]
+        self.categories = (known + extra)[:category_count]
+
+    def __iter__(self):
+        rng = random.Random(self.seed)
+        for i in range(self.card_count):
+            word_count = rng.randint(
+                max(1, self.question_words // 2), self.question_words
+            )
+            words = [rng.choice(WORDS) for _ in range(word_count)]
+            question = " ".join(words).capitalize() + "?"
+            yield (self.categories[i % len(self.categories)], question)
+
+
+def case_name(card_count, category_count, question_words):
+    return f"{card_count}cards-{category_count}cats-{question_words}words"
+
+
+def run_case(card_count, category_count, question_words, renderer_options):
+    """Render one synthetic deck and return its measurements."""
+    stages = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, "bench.pdf")
+        start = time.perf_counter()
+
+        stage_start = time.perf_counter()
+        resource_manager = ResourceManager()
+        resource_manager.register_all_fonts()
+        resource_manager.get_logo()
+        stages["resources"] = time.perf_counter() - stage_start
+
+        style_manager = StyleManager()
+        card_data = CardData(SyntheticDeck(card_count, category_count, question_words))
+        generator = FlashcardGenerator(output_file=output_file, invariant=True)
+        card_renderer = CardRenderer(
+            generator.canvas, style_manager, resource_manager, **renderer_options
+        )
+        title_page_generator = TitlePageGenerator(
+            generator.canvas,
+            generator.page_width,
+            generator.page_height,
+            resource_manager,
+            card_renderer,
+        )
+
+        stage_start = time.perf_counter()
+        title_page_generator.create_title_page()
+        generator.canvas.showPage()
+        stages["title_page"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        generator.draw_card_pages(card_data.iter_cards(), card_renderer, style_manager)
+        stages["cards"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        generator.canvas.save()
+        stages["save"] = time.perf_counter() - stage_start
+
+        seconds = time.perf_counter() - start
+        output_bytes = os.path.getsize(output_file)
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+
+    return {
+        "name": case_name(card_count, category_count, question_words),
+        "cards": card_count,
+        "categories": category_count,
+        "question_words": question_words,
+        "seconds": seconds,
+        "cards_per_sec": card_count / seconds,
+        "stages": stages,
+        "output_bytes": output_bytes,
+        "bytes_per_card": output_bytes / card_count,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def run_benchmarks(cases, renderer_options):
+    """Run every case in its own fresh process."""
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_case, *case, renderer_options).result()
+        results.append(result)
+        print(
+            f"{result['name']:>30}  {result['cards_per_sec']:9.1f} cards/s  "
+            f"{result['bytes_per_card']:9.0f} B/card  "
+            f"{result['peak_rss_bytes'] / 2**20:7.1f} MiB peak"
+        )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline and return the list of regressions."""
+    baseline_cases = {case["name"]: case for case in baseline["results"]}
+    regressions = []
+
+    # (metric, True if higher is better)
+    metrics = [
+        ("cards_per_sec", True),
+        ("bytes_per_card", False),
+        ("peak_rss_bytes", False),
+    ]
+    for result in results:
+        previous = baseline_cases.get(result["name"])
+        if previous is None:
+            continue
+        for metric, higher_is_better in metrics:
+            old, new = previous[metric], result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > threshold else ""
+            print(f"{result['name']:>30}  {metric:>15}  {change:+8.1%}  {flag}")
+            if flag:
+                regressions.append((result["name"], metric, change))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument(
+        "--case",
+        action="append",
+        metavar="CARDS:CATEGORIES:WORDS",
+        help="run a custom case instead of a preset (repeatable)",
+    )
+    parser.add_argument(
+        "--templates", action="store_true", help="benchmark template mode"
+    )
+    parser.add_argument(
+        "--output", default="bench_results.json", help="results JSON file"
+    )
+    parser.add_argument("--baseline", help="results JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative change that counts as a regression (default 0.10)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.case:
+        cases = [tuple(int(part) for part in case.split(":")) for case in args.case]
+    else:
+        cases = PRESETS[args.preset]
+    renderer_options = {"use_templates": args.templates}
+
+    results = run_benchmarks(cases, renderer_options)
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "reportlab": reportlab.Version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "renderer_options": renderer_options,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
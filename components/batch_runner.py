@@ -0,0 +1,173 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from components.resource_manager import ResourceManager
+from components.card_data import CardData
+from components.style_manager import StyleManager
+from components.card_renderer import LOGO_SIZE, CardRenderer
+from components.title_page_generator import TitlePageGenerator
+from components.flashcard_generator import FlashcardGenerator
+from components.title_page_cache import TitlePageCache
+
+# Warm ResourceManagers for a pool worker, keyed by logo path
+_worker_resources = {}
+
+# Title pages for a pool worker, kept in memory between jobs
+_title_cache = None
+
+
+def get_title_cache():
+    """Return this process's title page cache, creating it once."""
+    global _title_cache
+    if _title_cache is None:
+        _title_cache = TitlePageCache()
+    return _title_cache
+
+
+def get_worker_resources(logo_path):
+    """Return this process's ResourceManager for a logo, loading it once."""
+    resource_manager = _worker_resources.get(logo_path)
+    if resource_manager is None:
+        resource_manager = ResourceManager(logo_path=logo_path)
+        resource_manager.register_all_fonts()
+        logo = resource_manager.get_logo(LOGO_SIZE, LOGO_SIZE)
+        if logo:
+            # Decode now rather than in the middle of the first job
+            logo.getRGBData()
+        _worker_resources[logo_path] = resource_manager
+    return resource_manager
+
+
+def _init_worker(logo_path):
+    """Load fonts and the default logo once for this worker process."""
+    get_worker_resources(logo_path)
+
+
+def load_manifest(path):
+    """Read a batch manifest and return its list of deck jobs.
+
+    The manifest is a JSON object with a "decks" list (or just the list).
+    Each deck has an "output" path and optionally "deck" (a CSV/JSONL
+    source), inline "cards" ([category, question] pairs; the built-in deck
+    is used when neither is given), "logo", "styles" (see
+    StyleManager.apply_overrides), "fidelity" and "templates", "seed",
+    "invariant", "group_by_category" and "stepped_gradients" flags. Relative paths are
+    resolved against the manifest's directory.
+    """
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    jobs = manifest["decks"] if isinstance(manifest, dict) else manifest
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for i, job in enumerate(jobs):
+        if "output" not in job:
+            raise ValueError(f"{path}: deck {i} has no output path")
+        job.setdefault("name", os.path.splitext(os.path.basename(job["output"]))[0])
+        for key in ("deck", "output", "logo"):
+            if job.get(key):
+                job[key] = os.path.join(base_dir, job[key])
+    return jobs
+
+
+def run_job(job, default_logo_path="insect_asylum_logo.png"):
+    """Render one deck job with this process's warm resources."""
+    start = time.perf_counter()
+    resource_manager = get_worker_resources(job.get("logo") or default_logo_path)
+
+    style_manager = StyleManager()
+    style_manager.apply_overrides(job.get("styles", {}))
+    if job.get("cards") is not None:
+        card_data = CardData(job["cards"])
+    elif job.get("deck"):
+        card_data = CardData.from_file(job["deck"])
+    else:
+        card_data = CardData()
+
+    generator = FlashcardGenerator(
+        output_file=job["output"],
+        invariant=job.get("invariant", False),
+        group_by_category=job.get("group_by_category", False),
+        fidelity=job.get("fidelity", "final"),
+        title_cache=get_title_cache(),
+    )
+    card_renderer = CardRenderer(
+        generator.canvas,
+        style_manager,
+        resource_manager,
+        use_templates=job.get("templates", False),
+        pattern_seed=job.get("seed", 0),
+        gradient_mode="stepped" if job.get("stepped_gradients") else "shading",
+        fidelity=job.get("fidelity", "final"),
+    )
+    title_page_generator = TitlePageGenerator(
+        generator.canvas,
+        generator.page_width,
+        generator.page_height,
+        resource_manager,
+        card_renderer,
+    )
+    generator.generate_cards(
+        card_data, card_renderer, title_page_generator, style_manager
+    )
+    return time.perf_counter() - start
+
+
+def _run_job_safely(job, default_logo_path):
+    """Run a job and report its outcome instead of raising."""
+    result = {"name": job["name"], "output": job["output"], "pid": os.getpid()}
+    try:
+        result["seconds"] = run_job(job, default_logo_path)
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+class BatchRunner:
+    """Builds every deck in a manifest on a pool of warm worker processes."""
+
+    def __init__(
+        self, manifest_path, workers=None, logo_path="insect_asylum_logo.png"
+    ):
+        self.jobs = load_manifest(manifest_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.logo_path = logo_path
+        self.results = []
+
+    def run(self):
+        """Run all jobs, print a timing summary and return how many failed.
+
+        The per-job results are kept in self.results.
+        """
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(self.jobs)) or 1,
+            initializer=_init_worker,
+            initargs=(self.logo_path,),
+        ) as pool:
+            futures = [
+                pool.submit(_run_job_safely, job, self.logo_path) for job in self.jobs
+            ]
+            results = [future.result() for future in futures]
+        total = time.perf_counter() - start
+
+        self.results = results
+        self.print_summary(results, total)
+        return sum(1 for result in results if result["status"] != "ok")
+
+    def print_summary(self, results, total):
+        """Print per-job timings and the overall wall-clock time."""
+        print("\nBatch summary")
+        for result in results:
+            if result["status"] == "ok":
+                print(
+                    f"  ✅ {result['name']:<30} {result['seconds']:8.2f}s"
+                    f"  (pid {result['pid']})"
+                )
+            else:
+                print(f"  ❌ {result['name']:<30} {result['error']}")
+        failed = sum(1 for result in results if result["status"] != "ok")
+        print(f"{len(results) - failed} of {len(results)} decks built in {total:.2f}s")
@@ -0,0 +1,306 @@
+import io
+import marshal
+import os
+
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.card_renderer import CardRenderer
+from components.title_page_generator import DEFAULT_SUBTITLE, DEFAULT_TITLE
+from components.flashcard_generator import FlashcardGenerator
+from components.fingerprint import file_digest, hash_description
+from components.page_capture import PageReplayer, capture_pages, get_font_states
+from components.title_page_cache import TitlePageCache
+from components.render_workers import get_imposition, iter_deck, iter_page_groups
+
+# Source files whose drawing code affects how a page looks
+RENDER_MODULES = (
+    "card_renderer.py",
+    "pattern_generator.py",
+    "text_layout.py",
+    "title_page_generator.py",
+    "flashcard_generator.py",
+    "state_canvas.py",
+    "image_pipeline.py",
+    "style_manager.py",
+    "imposition.py",
+    "page_capture.py",
+)
+
+# Once the cache grows past this many bytes, the entries used least
+# recently are evicted
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class BuildCache:
+    """Stores captured pages on disk, keyed by a hash of their inputs.
+
+    Each entry holds the captured pages of one sheet (see page_capture),
+    and the images they draw are stored once beside them, so the logo on
+    every card is kept a single time. Entries are touched whenever they are
+    used, and evict removes the least recently used ones.
+    """
+
+    def __init__(
+        self, cache_dir=".flashcard_cache", max_bytes=DEFAULT_MAX_CACHE_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.pages_dir = os.path.join(cache_dir, "pages")
+        self.images_dir = os.path.join(cache_dir, "images")
+        os.makedirs(self.pages_dir, exist_ok=True)
+        os.makedirs(self.images_dir, exist_ok=True)
+
+    def page_path(self, key):
+        """Return where the pages for a key are (or would be) stored."""
+        return os.path.join(self.pages_dir, f"{key}-m{marshal.version}.marshal")
+
+    def image_path(self, name):
+        """Return where a captured image is (or would be) stored."""
+        return os.path.join(self.images_dir, f"{name}-m{marshal.version}.marshal")
+
+    def has_page(self, key):
+        """Return whether pages have already been captured for a key."""
+        return os.path.exists(self.page_path(key))
+
+    def load_page(self, key, used_paths):
+        """Return the capture stored for a key, or None if it is missing.
+
+        The files read are touched and added to used_paths, so evict keeps
+        them.
+        """
+        page_path = self.page_path(key)
+        capture = self._load(page_path)
+        if capture is None:
+            return None
+        images = {}
+        for name in capture["images"]:
+            image_path = self.image_path(name)
+            image = self._load(image_path)
+            if image is None:
+                return None
+            images[name] = image
+            used_paths.add(image_path)
+        capture["images"] = images
+        used_paths.add(page_path)
+        return capture
+
+    def _load(self, path):
+        """Read and touch a marshalled cache file, or return None."""
+        try:
+            # marshal.load reads a file in small pieces; one read is much faster
+            with open(path, "rb") as f:
+                value = marshal.loads(f.read())
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable cache file {path} ({e})")
+            return None
+        return value
+
+    def store_page(self, key, capture, used_paths):
+        """Store captured pages, writing only the images not stored already."""
+        for name, image in capture["images"].items():
+            image_path = self.image_path(name)
+            if not os.path.exists(image_path):
+                self._store(image_path, image)
+            used_paths.add(image_path)
+        page_path = self.page_path(key)
+        self._store(page_path, dict(capture, images=sorted(capture["images"])))
+        used_paths.add(page_path)
+
+    def _store(self, path, value):
+        """Write a marshalled cache file atomically."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(marshal.dumps(value))
+        os.replace(temp_path, path)
+
+    def evict(self, keep=()):
+        """Remove the least recently used files until the cache fits max_bytes.
+
+        Files in keep are never removed. Returns the number removed; a page
+        whose image was removed is captured again when it is next needed.
+        """
+        entries = []
+        for directory in (self.pages_dir, self.images_dir):
+            with os.scandir(directory) as scan:
+                for entry in scan:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+class IncrementalBuilder:
+    """Rebuilds a deck PDF, re-rendering only pages whose inputs changed."""
+
+    def __init__(
+        self,
+        output_file="nature_flashcards_premium.pdf",
+        cache_dir=".flashcard_cache",
+        logo_path="insect_asylum_logo.png",
+        logo_dpi=300,
+        group_by_category=False,
+        imposition=None,
+        title=DEFAULT_TITLE,
+        subtitle=DEFAULT_SUBTITLE,
+        style_overrides=None,
+        max_cache_bytes=DEFAULT_MAX_CACHE_BYTES,
+        **renderer_options,
+    ):
+        self.output_file = output_file
+        self.cache = BuildCache(cache_dir, max_cache_bytes)
+        self.title_cache = TitlePageCache(os.path.join(cache_dir, "title-pages"))
+        self.title = title
+        self.subtitle = subtitle
+        self.group_by_category = group_by_category
+        self.renderer_options = renderer_options
+        self.resource_manager = ResourceManager(logo_path=logo_path, logo_dpi=logo_dpi)
+        self.style_overrides = style_overrides or {}
+        self.style_manager = StyleManager.from_overrides(self.style_overrides)
+        self.imposition = get_imposition(imposition, self.style_manager)
+        self.style_fingerprints = {}
+        self.build_fingerprint = self._get_build_fingerprint()
+
+    def _get_build_fingerprint(self):
+        """Hash every input shared by all pages: code, layout, fonts and logo."""
+        components_dir = os.path.dirname(os.path.abspath(__file__))
+        logo_path = self.resource_manager.logo_path
+        description = {
+            "code": [
+                file_digest(os.path.join(components_dir, name))
+                for name in RENDER_MODULES
+            ],
+            "layout": [
+                *self.imposition.page_size,
+                self.imposition.cols,
+                self.imposition.rows,
+                self.imposition.describe(),
+                self.style_manager.card_width,
+                self.style_manager.card_height,
+                self.style_manager.header_height,
+            ],
+            "fonts": {
+                name: file_digest(self.resource_manager.get_font_path(name))
+                for name in self.resource_manager.FONT_FILES
+            },
+            "logo": file_digest(logo_path) if os.path.exists(logo_path) else None,
+            "logo_dpi": self.resource_manager.logo_dpi,
+            "renderer": sorted(self.renderer_options.items()),
+            "styles": self.style_overrides,
+        }
+        return hash_description(description)
+
+    def _get_style_fingerprint(self, category):
+        """Describe the resolved colors and typography of a category."""
+        fingerprint = self.style_fingerprints.get(category)
+        if fingerprint is None:
+            color_scheme = self.style_manager.get_color_scheme(category)
+            typography = self.style_manager.get_typography(category)
+            fingerprint = [
+                sorted((name, repr(color)) for name, color in color_scheme.items()),
+                sorted(typography.items()),
+            ]
+            self.style_fingerprints[category] = fingerprint
+        return fingerprint
+
+    def get_page_key(self, cards):
+        """Hash everything that determines how a page of cards is drawn."""
+        return hash_description(
+            [
+                self.build_fingerprint,
+                [list(card) for card in cards],
+                [self._get_style_fingerprint(category) for category, _ in cards],
+            ]
+        )
+
+    def _capture_page(self, cards, font_states):
+        """Render a sheet of cards on a scratch canvas and capture it.
+
+        The scratch document starts from the font states of the document
+        being built, so the capture's character codes agree with it.
+        """
+        generator = FlashcardGenerator(
+            output_file=io.BytesIO(), invariant=True, imposition=self.imposition
+        )
+        PageReplayer(generator.canvas, self.resource_manager).merge_fonts(font_states)
+        card_renderer = CardRenderer(
+            generator.canvas,
+            self.style_manager,
+            self.resource_manager,
+            **self.renderer_options,
+        )
+        generator.draw_card_pages(cards, card_renderer, self.style_manager)
+        return capture_pages(generator.canvas)
+
+    def iter_pages(self, card_data):
+        """Split the deck into lists of cards, one list per page."""
+        return iter_page_groups(
+            iter_deck(card_data, self.group_by_category),
+            self.imposition.cards_per_page,
+        )
+
+    def build(self, card_data):
+        """Build the PDF from cached pages, rendering only the ones missing.
+
+        Cached pages are replayed into one document, so fonts, images and
+        card templates are embedded once however many pages share them.
+        """
+        generator = FlashcardGenerator(
+            output_file=self.output_file, invariant=True, imposition=self.imposition
+        )
+        replayer = PageReplayer(generator.canvas, self.resource_manager)
+        used_paths = set()
+        pages = 0
+        rendered = 0
+        # The title page comes first, from the shared title page cache.
+        # Drafts have no title page.
+        if self.renderer_options.get("fidelity") != "draft":
+            capture, title_rendered = self.title_cache.get_capture(
+                self.resource_manager,
+                self.imposition,
+                self.title,
+                self.subtitle,
+                self.renderer_options.get("pattern_seed", 0),
+                self.renderer_options.get("gradient_mode", "shading"),
+            )
+            # A fresh document has no font codes for the capture to clash with
+            generator.draw_captured_title_page(capture, self.resource_manager)
+            generator.end_title_page()
+            pages += 1
+            rendered += title_rendered
+        for cards in self.iter_pages(card_data):
+            key = self.get_page_key(cards)
+            capture = self.cache.load_page(key, used_paths)
+            if capture is None or not replayer.merge_fonts(capture["fonts"]):
+                # Missing, or captured after characters this document has
+                # given other codes: render it again to fit this document
+                capture = self._capture_page(
+                    cards, get_font_states(generator.canvas._doc)
+                )
+                self.cache.store_page(key, capture, used_paths)
+                replayer.merge_fonts(capture["fonts"])
+                rendered += 1
+            for page in capture["pages"]:
+                replayer.draw_page(page, capture["images"])
+            pages += 1
+
+        generator.canvas.save()
+        self.cache.evict(keep=used_paths)
+        print(f"♻️ Re-rendered {rendered} of {pages} pages")
+        print(f"✨ The Insect Asylum nature flashcards saved to: {os.path.abspath(self.output_file)}")
+        return rendered
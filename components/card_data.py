@@ -1,84 +1,197 @@
+from components.compiled_deck import CompiledDeck, compile_deck
+from components.deck_sources import open_deck_source
+
+# Built-in deck used when no deck source is given
+DEFAULT_CARDS = [
+    # Original categories with enhanced questions
+    ("Nature Detectives", "How does it feel in your hand?"),
+    ("Nature Detectives", "What colors pop out at you?"),
+    ("Nature Detectives", "Does it remind you of something else?"),
+    ("Nature Detectives", "What's the coolest thing about it?"),
+    
+    ("Animal Treasures", "Which animal left this behind?"),
+    ("Animal Treasures", "How did this help the animal live?"),
+    ("Animal Treasures", "Was the animal big or tiny?"),
+    ("Animal Treasures", "How did the animal use this?"),
+    
+    ("Nature's Art", "What cool shapes do you see?"),
+    ("Nature's Art", "Can you find a pattern that repeats?"),
+    ("Nature's Art", "Is it the same on all sides?"),
+    ("Nature's Art", "Which part looks the most special?"),
+    
+    ("Super Senses", "Does it feel heavy or light?"),
+    ("Super Senses", "What sound does it make when tapped?"),
+    ("Super Senses", "What does it smell like?"),
+    ("Super Senses", "Is it smooth or bumpy?"),
+    
+    ("Mystery Box", "Can you guess what this is?"),
+    ("Mystery Box", "Why is it shaped this way?"),
+    ("Mystery Box", "What job did it do in nature?"),
+    ("Mystery Box", "What clues can you find?"),
+    
+    ("Wild Homes", "Where did this animal live?"),
+    ("Wild Homes", "How did it stay safe?"),
+    ("Wild Homes", "What weather did it face?"),
+    ("Wild Homes", "Who were its neighbors in nature?"),
+    
+    # New categories with great questions
+    ("Time Machine", "How old might this be?"),
+    ("Time Machine", "How has it changed over time?"),
+    ("Time Machine", "What made it look this way?"),
+    ("Time Machine", "What story does it tell?"),
+    
+    ("Texture Explorers", "Smooth or bumpy?"),
+    ("Texture Explorers", "Hard or squishy?"),
+    ("Texture Explorers", "How many textures can you find?"),
+    ("Texture Explorers", "What happens when you touch it?"),
+    
+    ("Compare & Contrast", "How is this different from that one?"),
+    ("Compare & Contrast", "Which is heavier and why?"),
+    ("Compare & Contrast", "What do these have in common?"),
+    ("Compare & Contrast", "Which would last longer in nature?"),
+    
+    ("Nature's Helpers", "How does this help other animals?"),
+    ("Nature's Helpers", "What job does this do in nature?"),
+    ("Nature's Helpers", "How does it fit in its ecosystem?"),
+    ("Nature's Helpers", "Who depends on this to survive?"),
+    
+    # Thought-provoking questions that still work for kids
+    ("Nature's Puzzles", "Why is it shaped exactly this way?"),
+    ("Nature's Puzzles", "What problem did this solve in nature?"),
+    ("Nature's Puzzles", "How would it be different if it lived elsewhere?"),
+    ("Nature's Puzzles", "What secrets is it keeping?"),
+    
+    ("Imagination Station", "If this could talk, what would it say?"),
+    ("Imagination Station", "What animal would want this as a home?"),
+    ("Imagination Station", "If you were tiny, how would you use this?"),
+    ("Imagination Station", "What would you name this if you discovered it?"),
+]
+
+
 class CardData:
     """Manages flashcard content including categories and questions."""
     
-    def __init__(self):
-        self.cards = [
-            # Original categories with enhanced questions
-            ("Nature Detectives", "How does it feel in your hand?"),
-            ("Nature Detectives", "What colors pop out at you?"),
-            ("Nature Detectives", "Does it remind you of something else?"),
-            ("Nature Detectives", "What's the coolest thing about it?"),
-            
-            ("Animal Treasures", "Which animal left this behind?"),
-            ("Animal Treasures", "How did this help the animal live?"),
-            ("Animal Treasures", "Was the animal big or tiny?"),
-            ("Animal Treasures", "How did the animal use this?"),
-            
-            ("Nature's Art", "What cool shapes do you see?"),
-            ("Nature's Art", "Can you find a pattern that repeats?"),
-            ("Nature's Art", "Is it the same on all sides?"),
-            ("Nature's Art", "Which part looks the most special?"),
-            
-            ("Super Senses", "Does it feel heavy or light?"),
-            ("Super Senses", "What sound does it make when tapped?"),
-            ("Super Senses", "What does it smell like?"),
-            ("Super Senses", "Is it smooth or bumpy?"),
-            
-            ("Mystery Box", "Can you guess what this is?"),
-            ("Mystery Box", "Why is it shaped this way?"),
-            ("Mystery Box", "What job did it do in nature?"),
-            ("Mystery Box", "What clues can you find?"),
-            
-            ("Wild Homes", "Where did this animal live?"),
-            ("Wild Homes", "How did it stay safe?"),
-            ("Wild Homes", "What weather did it face?"),
-            ("Wild Homes", "Who were its neighbors in nature?"),
-            
-            # New categories with great questions
-            ("Time Machine", "How old might this be?"),
-            ("Time Machine", "How has it changed over time?"),
-            ("Time Machine", "What made it look this way?"),
-            ("Time Machine", "What story does it tell?"),
-            
-            ("Texture Explorers", "Smooth or bumpy?"),
-            ("Texture Explorers", "Hard or squishy?"),
-            ("Texture Explorers", "How many textures can you find?"),
-            ("Texture Explorers", "What happens when you touch it?"),
-            
-            ("Compare & Contrast", "How is this different from that one?"),
-            ("Compare & Contrast", "Which is heavier and why?"),
-            ("Compare & Contrast", "What do these have in common?"),
-            ("Compare & Contrast", "Which would last longer in nature?"),
-            
-            ("Nature's Helpers", "How does this help other animals?"),
-            ("Nature's Helpers", "What job does this do in nature?"),
-            ("Nature's Helpers", "How does it fit in its ecosystem?"),
-            ("Nature's Helpers", "Who depends on this to survive?"),
-            
-            # Thought-provoking questions that still work for kids
-            ("Nature's Puzzles", "Why is it shaped exactly this way?"),
-            ("Nature's Puzzles", "What problem did this solve in nature?"),
-            ("Nature's Puzzles", "How would it be different if it lived elsewhere?"),
-            ("Nature's Puzzles", "What secrets is it keeping?"),
-            
-            ("Imagination Station", "If this could talk, what would it say?"),
-            ("Imagination Station", "What animal would want this as a home?"),
-            ("Imagination Station", "If you were tiny, how would you use this?"),
-            ("Imagination Station", "What would you name this if you discovered it?"),
-        ]
+    def __init__(self, source=None):
+        # A source is any re-iterable of (category, question) pairs, such as
+        # the streaming file readers in deck_sources. A CompiledDeck source
+        # is also indexed and answers the queries below without loading the
+        # deck. Without a source the built-in deck is held in memory.
+        self.source = source
+        self.cards = []
+    
+        # Positions of each category's cards in self.cards, and their counts,
+        # in the order the categories first appear
+        self.category_index = {}
+        self.category_counts = {}
+        if source is None:
+            self.add_cards(DEFAULT_CARDS)
+        elif self.is_compiled():
+            # A compiled deck's counts come from its category table, once
+            self.category_counts = source.get_category_counts()
+    
+    @classmethod
+    def from_file(cls, path):
+        """Create card data that reads its cards from a CSV, JSONL or .deck file."""
+        return cls(open_deck_source(path))
+    
+    def add_card(self, category, question):
+        """Add a card and record its position in the category index."""
+        self.category_index.setdefault(category, []).append(len(self.cards))
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        self.cards.append((category, question))
+    
+    def add_cards(self, cards):
+        """Add several (category, question) cards."""
+        for category, question in cards:
+            self.add_card(category, question)
+    
+    def is_compiled(self):
+        """Return whether the cards come from a memory-mapped compiled deck."""
+        return isinstance(self.source, CompiledDeck)
+    
+    def compile(self, path):
+        """Write the cards to a compiled .deck file and return the card count."""
+        return compile_deck(self.iter_cards(), path)
+    
+    def load(self):
+        """Read a streamed deck into memory so it can be indexed and queried."""
+        if self.source is not None:
+            source = self.source
+            self.source = None
+            self.add_cards(source)
+        return self
+    
+    def iter_cards(self):
+        """Iterate over all cards without loading a streamed deck into memory."""
+        if self.source is not None:
+            return iter(self.source)
+        return iter(self.cards)
     
     def get_all_cards(self):
         """Return all cards."""
+        if self.source is not None:
+            return list(self.source)
         return self.cards
     
+    def get_card(self, index):
+        """Return the card at a position in the deck."""
+        if self.is_compiled():
+            return self.source[index]
+        return self.load().cards[index]
+    
+    def get_cards(self, start, stop=None):
+        """Return the cards in a range of positions as a list."""
+        if self.is_compiled():
+            return self.source[start:stop]
+        return self.load().cards[start:stop]
+    
     def get_card_count(self):
         """Return the total number of cards."""
+        if self.is_compiled():
+            return len(self.source)
+        if self.source is not None:
+            return sum(1 for _ in self.source)
         return len(self.cards)
     
+    # The query methods below use the category index. A streamed deck is
+    # loaded into memory the first time one of them is called; a compiled
+    # deck answers from its category table instead.
+    
+    def _get_counts(self):
+        """Return the stored card counts per category, indexing a streamed deck."""
+        if self.is_compiled():
+            return self.category_counts
+        return self.load().category_counts
+    
     def get_categories(self):
         """Return a set of all unique categories."""
-        return set(category for category, _ in self.cards)
+        return set(self._get_counts())
+    
+    def has_category(self, category):
+        """Return whether any card belongs to a category."""
+        return category in self._get_counts()
+    
+    def get_category_count(self, category):
+        """Return the number of cards in a category."""
+        return self._get_counts().get(category, 0)
+    
+    def get_category_counts(self):
+        """Return a dict of card counts per category, in first-seen order."""
+        return dict(self._get_counts())
     
     def get_cards_by_category(self, category):
         """Return all questions for a given category."""
-        return [question for cat, question in self.cards if cat == category]
+        if self.is_compiled():
+            return [question for _, question in self.source.iter_category(category)]
+        cards = self.load().cards
+        return [cards[i][1] for i in self.category_index.get(category, ())]
+    
+    def iter_by_category(self):
+        """Iterate over all cards grouped by category, in first-seen order."""
+        if self.is_compiled():
+            yield from self.source.iter_by_category()
+            return
+        cards = self.load().cards
+        for positions in self.category_index.values():
+            for i in positions:
+                yield cards[i]
@@ -1,16 +1,94 @@
-import random
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+from reportlab.pdfbase import pdfdoc
+from components.page_capture import get_form_resources
+from components.pattern_generator import DotPatternGenerator, derive_pattern_seed
+from components.text_layout import TextLayout
+from components.tracing import NULL_TRACER, traced
+
+# Rendering fidelity, from quickest to full quality. Draft keeps the exact
+# card geometry and text but drops the decorations and logo; proof drops
+# only the shadow and dot pattern.
+FIDELITY_LEVELS = ("draft", "proof", "final")
+
+# Width and height of the logo under each card's question
+LOGO_SIZE = 0.7 * inch
+
+
+def can_reuse_shadings(canvas):
+    """Return whether a canvas has the internals cached shadings are drawn with."""
+    return (
+        hasattr(getattr(canvas, "_doc", None), "addShading")
+        and hasattr(canvas, "_shadingUsed")
+        and hasattr(canvas, "_code")
+    )
 
 
 class CardRenderer:
     """Renders card elements and components."""
 
-    def __init__(self, canvas, style_manager, resource_manager):
+    def __init__(
+        self,
+        canvas,
+        style_manager,
+        resource_manager,
+        use_templates=False,
+        pattern_seed=0,
+        tracer=None,
+        gradient_mode="shading",
+        fidelity="final",
+    ):
+        if fidelity not in FIDELITY_LEVELS:
+            raise ValueError(f"Unknown fidelity level: {fidelity!r}")
+
         self.canvas = canvas
         self.style_manager = style_manager
         self.resource_manager = resource_manager
+        self.tracer = tracer or NULL_TRACER
+
+        # Dot patterns are seeded per card so output is reproducible
+        self.pattern_seed = pattern_seed
+        self.pattern_generator = DotPatternGenerator()
+
+        # Line breaking and text measurement share cached width tables
+        self.text_layout = TextLayout(resource_manager)
+
+        # Each category's style is compiled on first use and then reused, so
+        # drawing a card does no style lookups or allocation
+        self.compiled_styles = {}
+
+        # Template mode records each category's card chrome once as a form
+        # XObject and places that form for every card of the category
+        self.use_templates = use_templates
+        self.card_templates = {}
+
+        # Duplex sheets share one card back design, recorded on first use
+        self.back_template = None
+
+        # Gradients are native PDF axial shadings, one per color pair, unless
+        # gradient_mode is "stepped" (the original stacked rectangles) or the
+        # canvas lacks the internals shadings are shared through
+        self.gradient_mode = gradient_mode
+        self.gradient_shadings = {}
+
+        self.fidelity = fidelity
+
+    def set_canvas(self, canvas):
+        """Draw on a new canvas, keeping compiled styles and text metrics warm.
 
+        Forms and shadings belong to the document they were recorded in, so
+        they are recorded again on the new canvas.
+        """
+        self.canvas = canvas
+        self.card_templates = {}
+        self.back_template = None
+        self.gradient_shadings = {}
+
+    def set_font(self, font_name, font_size):
+        """Set the canvas font, registering it on first use."""
+        self.canvas.setFont(self.resource_manager.get_font(font_name), font_size)
+
+    @traced("shadow")
     def draw_card_shadow(
         self, x, y, width, height, radius=10, shadow_color=None, offset=3
     ):
@@ -32,16 +110,67 @@ class CardRenderer:
         if shadow_color is None:
             shadow_color = colors.Color(0, 0, 0, 0.3)
 
-        self.canvas.setFont(font_name, font_size)
+        self.set_font(font_name, font_size)
         self.canvas.setFillColor(shadow_color)
         self.canvas.drawString(x + offset, y - offset, text)
         self.canvas.setFillColor(main_color)
         self.canvas.drawString(x, y, text)
 
+    @traced("gradient")
     def draw_gradient_background(
         self, x, y, width, height, start_color, end_color, steps=15
     ):
         """Draw a vertical gradient background."""
+        if self.gradient_mode == "stepped" or not can_reuse_shadings(self.canvas):
+            self.draw_stepped_gradient(
+                x, y, width, height, start_color, end_color, steps=steps
+            )
+            return
+
+        self.canvas.saveState()
+
+        # Clip to the area, then map the shading's unit axis onto its height
+        path = self.canvas.beginPath()
+        path.rect(x, y, width, height)
+        self.canvas.clipPath(path, stroke=0, fill=0)
+        self.canvas.transform(1, 0, 0, height, x, y)
+        self.paint_gradient_shading(start_color, end_color)
+
+        self.canvas.restoreState()
+
+    def paint_gradient_shading(self, start_color, end_color):
+        """Paint the shading from start to end color over the current clip.
+
+        reportlab's public shade() and linearGradient() add a new shading
+        object to the document on every call. To share one object per color
+        pair, the shading is added and painted through canvas internals, and
+        only here. draw_gradient_background checks for them first with
+        can_reuse_shadings and falls back to stepped gradients without them.
+        """
+        key = (start_color.rgb(), end_color.rgb())
+        shading_name = self.gradient_shadings.get(key)
+        if shading_name is None:
+            function = pdfdoc.PDFExponentialFunction(C0=key[0], C1=key[1], N=1)
+            shading = pdfdoc.PDFAxialShading(
+                0,
+                0,
+                0,
+                1,
+                Function=function,
+                ColorSpace="DeviceRGB",
+                Extend="[true true]",
+            )
+            shading_name = self.canvas._doc.addShading(shading)
+            self.gradient_shadings[key] = shading_name
+
+        # Record the shading as used by this page or form, as shade() does
+        self.canvas._shadingUsed[shading_name] = shading_name
+        self.canvas._code.append(f"/{shading_name} sh")
+
+    def draw_stepped_gradient(
+        self, x, y, width, height, start_color, end_color, steps=15
+    ):
+        """Draw a vertical gradient as a stack of flat-colored bands."""
         for i in range(steps):
             ratio = i / float(steps - 1)
             r = start_color.red + (end_color.red - start_color.red) * ratio
@@ -55,30 +184,34 @@ class CardRenderer:
                 x, y + (i * segment_height), width, segment_height, fill=1, stroke=0
             )
 
-    def draw_subtle_pattern(self, x, y, width, height, pattern_color):
+    def get_style(self, category):
+        """Return the CompiledStyle for a category."""
+        style = self.compiled_styles.get(category)
+        if style is None:
+            style = self.style_manager.compile_style(category, self.text_layout)
+            self.compiled_styles[category] = style
+        return style
+
+    def get_pattern_seed(self, *parts):
+        """Derive a stable dot pattern seed from the renderer seed and some text."""
+        return derive_pattern_seed(self.pattern_seed, *parts)
+
+    @traced("dot_pattern")
+    def draw_subtle_pattern(self, x, y, width, height, pattern_color, seed=None):
         """Draw a subtle dot pattern background."""
         self.canvas.saveState()
         self.canvas.setFillColor(pattern_color)
 
-        # Draw a grid of small dots
-        spacing = 15
-        dot_size = 1.5
-
-        for i in range(int(width / spacing)):
-            for j in range(int(height / spacing)):
-                # Add some random offset for a more natural look
-                offset_x = random.uniform(-2, 2)
-                offset_y = random.uniform(-2, 2)
-
-                dot_x = x + (i * spacing) + offset_x
-                dot_y = y + (j * spacing) + offset_y
-
-                # Only draw if within bounds
-                if dot_x > x and dot_x < x + width and dot_y > y and dot_y < y + height:
-                    self.canvas.circle(dot_x, dot_y, dot_size, fill=1, stroke=0)
+        # The dots are written straight to the content stream, which skips
+        # building a reportlab path with four Bezier curves per dot
+        code = self.pattern_generator.get_code(width, height, seed)
+        self.canvas.translate(x, y)
+        if code:
+            self.canvas._code.append(code)
 
         self.canvas.restoreState()
 
+    @traced("corner_accents")
     def draw_corner_accents(self, x, y, width, height, color, size=8):
         """Draw simple corner accents."""
         self.canvas.setStrokeColor(color)
@@ -104,6 +237,7 @@ class CardRenderer:
         self.canvas.line(x + width - 5, y + 5, x + width - 5 - size, y + 5)
         self.canvas.line(x + width - 5, y + 5, x + width - 5, y + 5 + size)
 
+    @traced("divider")
     def draw_decorative_divider(self, x, y, width, color):
         """Draw a decorative divider line between header and content."""
         self.canvas.saveState()
@@ -120,147 +254,285 @@ class CardRenderer:
 
         self.canvas.restoreState()
 
+    @traced("card_template")
+    def get_card_template(self, category):
+        """Record the chrome for a category as a form XObject and return its name."""
+        form_name = self.card_templates.get(category)
+        if form_name is None:
+            card_width = self.style_manager.card_width
+            card_height = self.style_manager.card_height
+
+            # Category names are not valid PDF names, so number the forms
+            form_name = f"CardChrome{len(self.card_templates)}"
+
+            # Leave room for the shadow offset and the border stroke
+            self.canvas.beginForm(
+                form_name, -5, -5, card_width + 5, card_height + 5
+            )
+            self.draw_card_chrome(
+                0, 0, category, pattern_seed=self.get_pattern_seed(category)
+            )
+            self.canvas.endForm(Resources=get_form_resources(self.canvas))
+            self.card_templates[category] = form_name
+        return form_name
+
+    @traced("card")
     def draw_card(self, x, y, category, question):
         """Draw a complete card with all components."""
+        if self.use_templates:
+            form_name = self.get_card_template(category)
+            self.canvas.saveState()
+            self.canvas.translate(x, y)
+            self.canvas.doForm(form_name)
+            self.canvas.restoreState()
+        else:
+            self.draw_card_chrome(
+                x, y, category, pattern_seed=self.get_pattern_seed(category, question)
+            )
+
+        self.draw_card_content(x, y, category, question)
+
+    def draw_card_chrome(self, x, y, category, pattern_seed=None):
+        """Draw everything on a card that depends only on its category."""
         # Get the dimension constants
         card_width = self.style_manager.card_width
         card_height = self.style_manager.card_height
         header_height = self.style_manager.header_height
 
-        # Get colors for this category
-        color_scheme = self.style_manager.get_color_scheme(category)
-
-        # Get typography for this category - NEW
-        typography = self.style_manager.get_typography(category)
+        # Get colors and typography for this category
+        style = self.get_style(category)
+        final = self.fidelity == "final"
+        draft = self.fidelity == "draft"
 
         # Draw shadow for float effect
-        self.draw_card_shadow(
-            x,
-            y,
-            card_width,
-            card_height,
-            radius=10,
-            shadow_color=color_scheme["shadow_color"],
-            offset=4,
-        )
+        if final:
+            self.draw_card_shadow(
+                x,
+                y,
+                card_width,
+                card_height,
+                radius=10,
+                shadow_color=style.shadow_color,
+                offset=4,
+            )
 
         # Card border
-        self.canvas.setStrokeColor(color_scheme["border_color"])
-        self.canvas.setLineWidth(3)
-        self.canvas.roundRect(
-            x, y, card_width, card_height, radius=10, fill=0, stroke=1
-        )
+        with self.tracer.span("border"):
+            self.canvas.setStrokeColor(style.border_color)
+            self.canvas.setLineWidth(3)
+            self.canvas.roundRect(
+                x, y, card_width, card_height, radius=10, fill=0, stroke=1
+            )
 
-        # Draw gradient background
-        self.draw_gradient_background(
-            x + 1,
-            y + 1,
-            card_width - 2,
-            card_height - 2,
-            color_scheme["gradient_start"],
-            color_scheme["gradient_end"],
-            steps=15,
-        )
+        if not draft:
+            # Draw gradient background
+            self.draw_gradient_background(
+                x + 1,
+                y + 1,
+                card_width - 2,
+                card_height - 2,
+                style.gradient_start,
+                style.gradient_end,
+                steps=15,
+            )
 
-        # Draw subtle dot pattern
-        self.draw_subtle_pattern(
-            x + 10,
-            y + 10,
-            card_width - 20,
-            card_height - 20,
-            color_scheme["pattern_color"],
-        )
+        if final:
+            # Draw subtle dot pattern
+            self.draw_subtle_pattern(
+                x + 10,
+                y + 10,
+                card_width - 20,
+                card_height - 20,
+                style.pattern_color,
+                seed=pattern_seed,
+            )
 
-        # Draw corner accents
-        self.draw_corner_accents(
-            x, y, card_width, card_height, color_scheme["border_color"], size=10
-        )
+        if not draft:
+            # Draw corner accents
+            self.draw_corner_accents(
+                x, y, card_width, card_height, style.border_color, size=10
+            )
 
-        # Draw header background - no border radius
-        self.canvas.setFillColor(color_scheme["header"])
-        self.canvas.rect(
-            x + 5,
-            y + card_height - header_height - 5,
-            card_width - 10,
-            header_height,
-            fill=1,
-            stroke=0,
-        )
+        with self.tracer.span("header"):
+            # Draw header background - no border radius
+            self.canvas.setFillColor(style.header)
+            self.canvas.rect(
+                x + 5,
+                y + card_height - header_height - 5,
+                card_width - 10,
+                header_height,
+                fill=1,
+                stroke=0,
+            )
 
-        # Draw header text with shadow - using category-specific typography
-        header_font = typography["header_font"]
-        header_size = typography["header_size"]
-        text_width = self.canvas.stringWidth(category, header_font, header_size)
-        self.draw_text_with_shadow(
-            category,
-            x + (card_width - text_width) / 2,
-            y + card_height - (header_height / 2) - 5,  # Better vertical centering
-            header_font,
-            header_size,
-            colors.navy,
-        )
+            # Draw header text with shadow - using category-specific typography
+            header_font = style.header_font
+            header_size = style.header_size
+            text_x = x + style.header_text_x
+            text_y = y + style.header_text_y
+            if draft:
+                self.set_font(header_font, header_size)
+                self.canvas.setFillColor(colors.navy)
+                self.canvas.drawString(text_x, text_y, category)
+            else:
+                self.draw_text_with_shadow(
+                    category, text_x, text_y, header_font, header_size, colors.navy
+                )
 
         # Draw decorative divider between header and content
         self.draw_decorative_divider(
             x,
             y + card_height - header_height - 12,
             card_width,
-            color_scheme["border_color"],
+            style.border_color,
         )
 
+    @traced("card_back")
+    def draw_card_back(self, x, y):
+        """Draw the shared card back, as printed behind each card when duplexing."""
+        form_name = self.get_back_template()
+        self.canvas.saveState()
+        self.canvas.translate(x, y)
+        self.canvas.doForm(form_name)
+        self.canvas.restoreState()
+
+    def get_back_template(self):
+        """Record the card back once as a form XObject and return its name."""
+        if self.back_template is None:
+            card_width = self.style_manager.card_width
+            card_height = self.style_manager.card_height
+            self.canvas.beginForm("CardBack", -5, -5, card_width + 5, card_height + 5)
+            self.draw_card_back_design(0, 0)
+            self.canvas.endForm(Resources=get_form_resources(self.canvas))
+            self.back_template = "CardBack"
+        return self.back_template
+
+    def draw_card_back_design(self, x, y):
+        """Draw the card back: the default chrome around a large centered logo."""
+        card_width = self.style_manager.card_width
+        card_height = self.style_manager.card_height
+        color_scheme = self.style_manager.get_default_color_scheme()
+        draft = self.fidelity == "draft"
+
+        self.canvas.setStrokeColor(color_scheme["border_color"])
+        self.canvas.setLineWidth(3)
+        self.canvas.roundRect(
+            x, y, card_width, card_height, radius=10, fill=0, stroke=1
+        )
+
+        if not draft:
+            self.draw_gradient_background(
+                x + 1,
+                y + 1,
+                card_width - 2,
+                card_height - 2,
+                color_scheme["gradient_start"],
+                color_scheme["gradient_end"],
+            )
+        if self.fidelity == "final":
+            self.draw_subtle_pattern(
+                x + 10,
+                y + 10,
+                card_width - 20,
+                card_height - 20,
+                color_scheme["pattern_color"],
+                seed=self.get_pattern_seed("card back"),
+            )
+        if not draft:
+            self.draw_corner_accents(
+                x, y, card_width, card_height, color_scheme["border_color"], size=10
+            )
+
+        # Logo filling the card's height, less a margin
+        logo_size = card_height - 40
+        logo_x = x + (card_width - logo_size) / 2
+        logo_y = y + 20
+        cached_logo = (
+            False if draft else self.resource_manager.get_logo(logo_size, logo_size)
+        )
+        if draft:
+            self.canvas.setLineWidth(0.5)
+            self.canvas.rect(logo_x, logo_y, logo_size, logo_size, fill=0, stroke=1)
+        elif cached_logo is not False:
+            self.canvas.drawImage(
+                cached_logo,
+                logo_x,
+                logo_y,
+                width=logo_size,
+                height=logo_size,
+                mask="auto",
+            )
+        else:
+            self.set_font("DejaVuSans-Bold", 12)
+            self.canvas.setFillColor(color_scheme["border_color"])
+            text = "THE INSECT ASYLUM"
+            text_width = self.text_layout.string_width(text, "DejaVuSans-Bold", 12)
+            self.canvas.drawString(
+                x + (card_width - text_width) / 2, y + card_height / 2 - 4, text
+            )
+
+    def draw_card_content(self, x, y, category, question):
+        """Draw the question text and logo for a single card."""
+        card_width = self.style_manager.card_width
+        card_height = self.style_manager.card_height
+        header_height = self.style_manager.header_height
+        style = self.get_style(category)
+
         # Question text - using category-specific typography
-        question_font = typography["question_font"]
-        question_size = typography["question_size"]
-        self.canvas.setFont(question_font, question_size)
-        self.canvas.setFillColor(color_scheme["text_color"])
+        question_font = style.question_font
+        question_size = style.question_size
+        self.set_font(question_font, question_size)
+        self.canvas.setFillColor(style.text_color)
 
         max_width = card_width - 20
-        words = question.split()
-        line = ""
-        lines = []
-        for word in words:
-            test_line = line + word + " "
-            if (
-                self.canvas.stringWidth(test_line, question_font, question_size)
-                <= max_width
-            ):
-                line = test_line
-            else:
-                lines.append(line.strip())
-                line = word + " "
-        if line:
-            lines.append(line.strip())
+        with self.tracer.span("text_layout"):
+            lines = self.text_layout.wrap(
+                question, question_font, question_size, max_width
+            )
 
         # Draw question text with improved vertical spacing
         start_y = y + (card_height - header_height) / 2 + (len(lines) * 8) - 5
         line_spacing = 18  # Increased from 16 for better readability
 
-        for i, line in enumerate(lines):
-            text_width = self.canvas.stringWidth(line, question_font, question_size)
-            self.canvas.drawString(
-                x + (card_width - text_width) / 2, start_y - i * line_spacing, line
-            )
+        with self.tracer.span("text"):
+            for i, (line, text_width) in enumerate(lines):
+                self.canvas.drawString(
+                    x + (card_width - text_width) / 2, start_y - i * line_spacing, line
+                )
 
-        # Add centered logo at the bottom (unchanged)
-        cached_logo = self.resource_manager.get_logo()
-        if cached_logo is not False:  # False means loading failed previously
-            logo_width = 0.7 * inch
-            logo_height = 0.7 * inch
+        # Calculate where the last text line ends
+        last_line_y = start_y - (len(lines) - 1) * line_spacing
+        self.draw_card_logo(x, y, last_line_y, style.border_color)
 
-            # Calculate appropriate logo position based on number of text lines
-            min_space_above_logo = 25
+    @traced("logo")
+    def draw_card_logo(self, x, y, last_line_y, fallback_color):
+        """Add the centered logo below the question text."""
+        card_width = self.style_manager.card_width
+        logo_width = LOGO_SIZE
+        logo_height = LOGO_SIZE
+
+        # Calculate appropriate logo position based on number of text lines
+        min_space_above_logo = 25
+
+        # Ensure logo doesn't crowd the text
+        logo_y = min(y + 18, last_line_y - min_space_above_logo - logo_height)
 
-            # Calculate where the last text line ends
-            last_line_y = start_y - (len(lines) - 1) * line_spacing
+        # Don't let logo go below the card
+        if logo_y < y + 10:
+            logo_y = y + 10
 
-            # Ensure logo doesn't crowd the text
-            logo_y = min(y + 18, last_line_y - min_space_above_logo - logo_height)
+        logo_x = x + (card_width - logo_width) / 2  # Centered horizontally
 
-            # Don't let logo go below the card
-            if logo_y < y + 10:
-                logo_y = y + 10
+        if self.fidelity == "draft":
+            # Outline the logo's place so crowding can still be checked
+            self.canvas.setStrokeColor(fallback_color)
+            self.canvas.setLineWidth(0.5)
+            self.canvas.rect(logo_x, logo_y, logo_width, logo_height, fill=0, stroke=1)
+            return
 
-            logo_x = x + (card_width - logo_width) / 2  # Centered horizontally
+        # Add centered logo at the bottom (unchanged)
+        cached_logo = self.resource_manager.get_logo(logo_width, logo_height)
+        if cached_logo is not False:  # False means loading failed previously
             try:
                 self.canvas.drawImage(
                     cached_logo,
@@ -272,15 +544,15 @@ class CardRenderer:
                 )
             except Exception:
                 # Fallback to text if there's an issue drawing the image
-                self.canvas.setFont("DejaVuSans-Bold", 7)
-                self.canvas.setFillColor(color_scheme["border_color"])
+                self.set_font("DejaVuSans-Bold", 7)
+                self.canvas.setFillColor(fallback_color)
                 text = "THE INSECT ASYLUM"
                 text_width = self.canvas.stringWidth(text, "DejaVuSans-Bold", 7)
                 self.canvas.drawString(x + (card_width - text_width) / 2, y + 20, text)
         else:
             # If logo loading failed, add a text identifier
-            self.canvas.setFont("DejaVuSans-Bold", 7)
-            self.canvas.setFillColor(color_scheme["border_color"])
+            self.set_font("DejaVuSans-Bold", 7)
+            self.canvas.setFillColor(fallback_color)
             text = "THE INSECT ASYLUM"
             text_width = self.canvas.stringWidth(text, "DejaVuSans-Bold", 7)
             self.canvas.drawString(x + (card_width - text_width) / 2, y + 20, text)
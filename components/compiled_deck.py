@@ -0,0 +1,211 @@
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+
+# File layout, all integers little-endian:
+#   header        magic, category count, card count
+#   categories    per category a uint16 byte length and its UTF-8 name,
+#                 padded with zeros to a multiple of 8 bytes
+#   category ids  one uint16 per card, indexing the categories, padded to 8
+#   offsets       card count + 1 uint64 offsets into the question blob
+#   category starts  category count + 1 uint64 positions in the card order
+#   card order    one uint64 card index per card, grouped by category in
+#                 first-seen order; category n's cards are the slice from
+#                 its start to the next category's start
+#   questions     every question's UTF-8 text, back to back
+MAGIC = b"TIADECK2"
+HEADER = struct.Struct("<8sII")
+CATEGORY_LENGTH = struct.Struct("<H")
+MAX_CATEGORIES = 0xFFFF
+
+
+def _padding(size):
+    """Return the zero bytes that pad a section of a size to 8 bytes."""
+    return bytes(-size % 8)
+
+
+def compile_deck(cards, path):
+    """Write (category, question) cards to a compiled deck file.
+
+    Cards are streamed: the question text goes to a temporary file while
+    only the category ids and offsets are kept in memory.
+    """
+    categories = {}
+    category_ids = array("H")
+    offsets = array("Q", [0])
+
+    with tempfile.TemporaryFile() as blob:
+        for category, question in cards:
+            category_id = categories.get(category)
+            if category_id is None:
+                if len(categories) == MAX_CATEGORIES:
+                    raise ValueError(
+                        f"A deck can have at most {MAX_CATEGORIES} categories"
+                    )
+                category_id = categories[category] = len(categories)
+            category_ids.append(category_id)
+            offsets.append(offsets[-1] + blob.write(question.encode("utf-8")))
+
+        # Counting sort of the card indices by category
+        starts = array("Q", bytes(8 * (len(categories) + 1)))
+        for category_id in category_ids:
+            starts[category_id + 1] += 1
+        for category_id in range(len(categories)):
+            starts[category_id + 1] += starts[category_id]
+        order = array("Q", bytes(8 * len(category_ids)))
+        positions = starts[:-1]
+        for index, category_id in enumerate(category_ids):
+            order[positions[category_id]] = index
+            positions[category_id] += 1
+
+        if sys.byteorder != "little":
+            for table in (category_ids, offsets, starts, order):
+                table.byteswap()
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(categories), len(category_ids)))
+            table = b"".join(
+                CATEGORY_LENGTH.pack(len(name)) + name
+                for name in (category.encode("utf-8") for category in categories)
+            )
+            f.write(table + _padding(HEADER.size + len(table)))
+            ids = category_ids.tobytes()
+            f.write(ids + _padding(len(ids)))
+            f.write(offsets.tobytes())
+            f.write(starts.tobytes())
+            f.write(order.tobytes())
+            blob.seek(0)
+            shutil.copyfileobj(blob, f)
+        os.replace(temp_path, path)
+    return len(category_ids)
+
+
+class CompiledDeck:
+    """Random access to the cards of a compiled deck file through mmap.
+
+    Only the category names are decoded when the deck is opened. Card
+    lookups read their category id, offsets and text straight from the
+    mapped file, so a deck of millions of cards costs almost no memory.
+    Category counts and per-category iteration come from the stored
+    category index without scanning the cards.
+    Indexing returns a (category, question) pair and slicing a list of them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, category_count, card_count = HEADER.unpack_from(self.map)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path}: not a compiled deck file")
+
+        position = HEADER.size
+        self.categories = []
+        for _ in range(category_count):
+            (length,) = CATEGORY_LENGTH.unpack_from(self.map, position)
+            position += CATEGORY_LENGTH.size
+            name = self.map[position : position + length].decode("utf-8")
+            self.categories.append(name)
+            position += length
+        position += -position % 8
+
+        view = memoryview(self.map)
+        ids_size = card_count * 2
+        self.category_ids = view[position : position + ids_size].cast("H")
+        position += ids_size + -ids_size % 8
+        self.offsets = view[position : position + (card_count + 1) * 8].cast("Q")
+        position += (card_count + 1) * 8
+        self.category_starts = view[
+            position : position + (category_count + 1) * 8
+        ].cast("Q")
+        position += (category_count + 1) * 8
+        self.card_order = view[position : position + card_count * 8].cast("Q")
+        self.blob_start = position + card_count * 8
+        if sys.byteorder != "little":
+            # The file is little-endian; copy the tables into native order
+            self.category_ids = array("H", self.category_ids)
+            self.category_ids.byteswap()
+            self.offsets = array("Q", self.offsets)
+            self.offsets.byteswap()
+            self.category_starts = array("Q", self.category_starts)
+            self.category_starts.byteswap()
+            self.card_order = array("Q", self.card_order)
+            self.card_order.byteswap()
+        self.category_index = {
+            category: category_id
+            for category_id, category in enumerate(self.categories)
+        }
+
+    def close(self):
+        """Release the mapped file."""
+        if isinstance(self.category_ids, memoryview):
+            self.category_ids.release()
+            self.offsets.release()
+            self.category_starts.release()
+            self.card_order.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.category_ids)
+
+    def get_question(self, index):
+        """Decode the question of the card at an index."""
+        start = self.blob_start + self.offsets[index]
+        end = self.blob_start + self.offsets[index + 1]
+        return self.map[start:end].decode("utf-8")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("card index out of range")
+        return (self.categories[self.category_ids[index]], self.get_question(index))
+
+    def __iter__(self):
+        categories = self.categories
+        get_question = self.get_question
+        for index, category_id in enumerate(self.category_ids):
+            yield (categories[category_id], get_question(index))
+
+    def get_category_counts(self):
+        """Return a dict of card counts per category, in first-seen order."""
+        starts = self.category_starts
+        return {
+            category: starts[category_id + 1] - starts[category_id]
+            for category_id, category in enumerate(self.categories)
+        }
+
+    def iter_category(self, category):
+        """Iterate over the cards of one category through its card order slice."""
+        category_id = self.category_index.get(category)
+        if category_id is None:
+            return
+        card_order = self.card_order
+        get_question = self.get_question
+        start = self.category_starts[category_id]
+        end = self.category_starts[category_id + 1]
+        for position in range(start, end):
+            yield (category, get_question(card_order[position]))
+
+    def iter_by_category(self):
+        """Iterate over all cards grouped by category, in first-seen order."""
+        for category in self.categories:
+            yield from self.iter_category(category)
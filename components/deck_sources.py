@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+
+from components.compiled_deck import CompiledDeck
+
+class CsvDeckSource:
+    """Streams (category, question) pairs from a CSV file.
+
+    A header row naming the category and question columns is optional;
+    without one the first two columns are used. Blank rows are skipped.
+    """
+
+    def __init__(self, path, category_field="category", question_field="question"):
+        self.path = path
+        self.category_field = category_field
+        self.question_field = question_field
+
+    def __iter__(self):
+        # utf-8-sig drops the byte order mark Excel writes before the header
+        with open(self.path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            category_index, question_index = 0, 1
+            first_row = True
+            for line_number, row in enumerate(reader, start=1):
+                if not row or not any(cell.strip() for cell in row):
+                    continue
+                if first_row:
+                    # The header, if any, is the first row that isn't blank
+                    first_row = False
+                    header = [cell.strip().lower() for cell in row]
+                    if self.category_field in header and self.question_field in header:
+                        category_index = header.index(self.category_field)
+                        question_index = header.index(self.question_field)
+                        continue
+                try:
+                    yield (row[category_index].strip(), row[question_index].strip())
+                except IndexError:
+                    raise ValueError(
+                        f"{self.path}:{line_number}: expected a category and a question"
+                    ) from None
+
+
+class JsonlDeckSource:
+    """Streams (category, question) pairs from a JSON Lines file.
+
+    Each line holds either an object with category/question keys or a
+    two-item [category, question] array.
+    """
+
+    def __init__(self, path, category_field="category", question_field="question"):
+        self.path = path
+        self.category_field = category_field
+        self.question_field = question_field
+
+    def __iter__(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(
+                        f"{self.path}:{line_number}: invalid JSON ({e})"
+                    ) from None
+                card = self.parse_record(record)
+                if card is None:
+                    raise ValueError(
+                        f"{self.path}:{line_number}: expected a [category, question] "
+                        f"array or an object with string {self.category_field!r} and "
+                        f"{self.question_field!r} keys"
+                    )
+                yield card
+
+    def parse_record(self, record):
+        """Return the (category, question) in a JSON record, or None if it has none."""
+        if isinstance(record, dict):
+            category = record.get(self.category_field)
+            question = record.get(self.question_field)
+        elif isinstance(record, list) and len(record) == 2:
+            category, question = record
+        else:
+            return None
+        if not isinstance(category, str) or not isinstance(question, str):
+            return None
+        return (category, question)
+
+
+# Deck source classes keyed by file extension
+DECK_SOURCES = {
+    ".deck": CompiledDeck,
+    ".csv": CsvDeckSource,
+    ".jsonl": JsonlDeckSource,
+    ".ndjson": JsonlDeckSource,
+}
+
+
+def open_deck_source(path):
+    """Return a streaming deck source for a file, chosen by its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in DECK_SOURCES:
+        raise ValueError(f"Unsupported deck file type: {path}")
+    return DECK_SOURCES[extension](path)
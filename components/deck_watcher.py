@@ -0,0 +1,157 @@
+import io
+import os
+import time
+
+from components.title_page_cache import TitlePageCache
+from components.card_data import CardData
+from components.card_renderer import LOGO_SIZE, CardRenderer
+from components.flashcard_generator import FlashcardGenerator
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.title_page_generator import (
+    DEFAULT_SUBTITLE,
+    DEFAULT_TITLE,
+    TitlePageGenerator,
+)
+
+
+class DeckWatcher:
+    """Re-renders a deck whenever its deck or style file changes.
+
+    One process stays up with fonts, the logo, text metrics and compiled
+    styles loaded, so each render only pays for drawing and writing the
+    PDF. Files are polled for changes, which needs no extra dependencies
+    and works the same on every platform.
+    """
+
+    def __init__(
+        self,
+        output_file="nature_flashcards_premium.pdf",
+        deck_path=None,
+        styles_path=None,
+        interval=0.25,
+        logo_path="insect_asylum_logo.png",
+        logo_dpi=300,
+        invariant=False,
+        group_by_category=False,
+        fidelity="final",
+        imposition=None,
+        title=DEFAULT_TITLE,
+        subtitle=DEFAULT_SUBTITLE,
+        **renderer_options,
+    ):
+        self.output_file = output_file
+        self.deck_path = deck_path
+        self.styles_path = styles_path
+        self.watched_paths = [path for path in (deck_path, styles_path) if path]
+        self.interval = interval
+        self.invariant = invariant
+        self.group_by_category = group_by_category
+        self.fidelity = fidelity
+        self.imposition = imposition
+        self.title = title
+        self.subtitle = subtitle
+
+        # Passed through to the CardRenderer
+        self.renderer_options = renderer_options
+
+        # Everything that does not depend on the watched files is loaded once
+        self.resource_manager = ResourceManager(logo_path=logo_path, logo_dpi=logo_dpi)
+        self.resource_manager.register_all_fonts()
+        self.resource_manager.get_logo(LOGO_SIZE, LOGO_SIZE)
+        self.title_cache = TitlePageCache()
+
+        # Kept between renders until the style file changes
+        self.card_renderer = None
+        self.styles_state = None
+
+    def get_file_state(self, path):
+        """Return what identifies the current version of a file, or None."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get_card_renderer(self, canvas):
+        """Return the warm card renderer, rebuilt only when the styles changed."""
+        styles_state = self.styles_path and self.get_file_state(self.styles_path)
+        if self.card_renderer is None or styles_state != self.styles_state:
+            if self.styles_path:
+                style_manager = StyleManager.from_file(self.styles_path)
+            else:
+                style_manager = StyleManager()
+            self.card_renderer = CardRenderer(
+                canvas,
+                style_manager,
+                self.resource_manager,
+                fidelity=self.fidelity,
+                **self.renderer_options,
+            )
+            self.styles_state = styles_state
+        else:
+            self.card_renderer.set_canvas(canvas)
+        return self.card_renderer
+
+    def render(self):
+        """Render the deck once and return the number of cards drawn."""
+        card_data = CardData.from_file(self.deck_path) if self.deck_path else CardData()
+        buffer = io.BytesIO()
+        generator = FlashcardGenerator(
+            output_file=buffer,
+            invariant=self.invariant,
+            group_by_category=self.group_by_category,
+            fidelity=self.fidelity,
+            imposition=self.imposition,
+            title_cache=self.title_cache,
+        )
+        card_renderer = self.get_card_renderer(generator.canvas)
+        title_page_generator = TitlePageGenerator(
+            generator.canvas,
+            generator.page_width,
+            generator.page_height,
+            self.resource_manager,
+            card_renderer,
+            title=self.title,
+            subtitle=self.subtitle,
+        )
+        card_count = generator.generate_cards(
+            card_data,
+            card_renderer,
+            title_page_generator,
+            card_renderer.style_manager,
+        )
+
+        # Replace the output in one step so a PDF viewer never sees half a file
+        temp_path = f"{self.output_file}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(temp_path, self.output_file)
+        return card_count
+
+    def run(self, max_renders=None):
+        """Render now and again after every change, until interrupted."""
+        print(f"👀 Watching {', '.join(self.watched_paths)} (Ctrl+C to stop)")
+        output_file = os.path.abspath(self.output_file)
+        last_state = None
+        renders = 0
+        try:
+            while max_renders is None or renders < max_renders:
+                state = [self.get_file_state(path) for path in self.watched_paths]
+                if state != last_state:
+                    last_state = state
+                    renders += 1
+                    start = time.perf_counter()
+                    try:
+                        card_count = self.render()
+                    except Exception as e:
+                        print(f"Warning: Render failed ({e})")
+                    else:
+                        elapsed = time.perf_counter() - start
+                        print(
+                            f"[{time.strftime('%H:%M:%S')}] Rendered {card_count} "
+                            f"cards to {output_file} in {elapsed * 1000:.0f} ms"
+                        )
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
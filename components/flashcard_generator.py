@@ -1,51 +1,208 @@
 import os
-from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 
+from components.imposition import Imposition
+from components.page_capture import PageReplayer, can_capture
+from components.state_canvas import with_state_elision
+from components.streaming_pdf import StreamingCanvas
+from components.tracing import NULL_TRACER, traced
+
 class FlashcardGenerator:
     """Main class for coordinating the flashcard generation process."""
     
-    def __init__(self, output_file="nature_flashcards_premium.pdf"):
+    def __init__(
+        self,
+        output_file="nature_flashcards_premium.pdf",
+        invariant=False,
+        group_by_category=False,
+        tracer=None,
+        streaming=False,
+        elide_state=True,
+        fidelity="final",
+        imposition=None,
+        title_cache=None,
+    ):
         self.output_file = output_file
-        self.page_width, self.page_height = letter
+        self.tracer = tracer or NULL_TRACER
+        
+        # Grouping keeps each category's cards together so the renderer can
+        # reuse that category's style from card to card
+        self.group_by_category = group_by_category
+
+        # Draft output is for checking text fit and categories, so it leaves
+        # out the title page (the cards themselves are simplified by the
+        # CardRenderer's own fidelity setting)
+        self.fidelity = fidelity
+        
+        # A TitlePageCache, to draw the title page once per branding and
+        # reuse it as a form XObject
+        self.title_cache = title_cache
         
-        # Layout settings
-        self.cols = 2
-        self.rows = 5
-        self.cards_per_page = self.cols * self.rows
+        # Layout settings - the default imposition is the original 2 x 5
+        # grid of business cards on Letter paper
+        self.imposition = imposition or Imposition()
+        self.page_width, self.page_height = self.imposition.page_size
         
-        # Create canvas
-        self.canvas = canvas.Canvas(output_file, pagesize=letter)
+        # Create canvas - invariant mode drops the timestamp and random
+        # document ID so identical input produces an identical file. A
+        # streaming canvas writes each page out as soon as it is finished,
+        # so memory does not grow with the size of the deck.
+        canvas_class = StreamingCanvas if streaming else canvas.Canvas
+        if elide_state:
+            # Skip color, line width and font changes that change nothing
+            canvas_class = with_state_elision(canvas_class)
+        self.canvas = canvas_class(
+            output_file, pagesize=self.imposition.page_size, invariant=invariant
+        )
+    
+    @property
+    def cols(self):
+        return self.imposition.cols
+    
+    @property
+    def rows(self):
+        return self.imposition.rows
+    
+    @property
+    def cards_per_page(self):
+        return self.imposition.cards_per_page
     
-    def generate_cards(self, card_data, card_renderer, title_page_generator, style_manager):
-        """Generate the PDF with title page and cards."""
+    @traced("generate_cards")
+    def generate_cards(
+        self,
+        card_data,
+        card_renderer,
+        title_page_generator,
+        style_manager,
+        deck_loading=None,
+    ):
+        """Generate the PDF with title page and cards and return the card count.
+        
+        deck_loading is an optional future that finishes loading card_data on
+        another thread; it is waited for only once the title page is drawn.
+        """
         # Create the title page first
-        title_page_generator.create_title_page()
-        self.canvas.showPage()
+        if self.fidelity != "draft":
+            self.draw_title_page(title_page_generator)
         
-        # Calculate margins
-        margin_x = (self.page_width - (self.cols * style_manager.card_width)) / 2
-        margin_y = (self.page_height - (self.rows * style_manager.card_height)) / 2
+        if deck_loading is not None:
+            deck_loading.result()
         
-        # Generate all the flashcards
-        cards = card_data.get_all_cards()
-        for i, (category, question) in enumerate(cards):
-            page_index = i % self.cards_per_page
-            col = page_index % self.cols
-            row = page_index // self.cols
+        # Generate all the flashcards, streaming them so the deck never has
+        # to be held in memory
+        card_count = self.draw_card_pages(
+            self.iter_deck(card_data), card_renderer, style_manager
+        )
+        
+        # Save the PDF
+        with self.tracer.span("save"):
+            self.canvas.save()
+        if isinstance(self.output_file, str):
+            print(f"✨ The Insect Asylum nature flashcards saved to: {os.path.abspath(self.output_file)}")
+        return card_count
+    
+    def draw_title_page(self, title_page_generator):
+        """Draw the title page, with a blank back when printing duplex.
+        
+        With a title cache the page comes from there as a form XObject. It
+        is drawn directly without one, or if the cached page cannot be used
+        on this canvas.
+        """
+        if self.title_cache is None or not self.draw_cached_title_page(
+            title_page_generator
+        ):
+            title_page_generator.create_title_page()
+        self.end_title_page()
+    
+    def draw_cached_title_page(self, title_page_generator):
+        """Draw the title page from the title cache, or return False if it cannot be."""
+        if not can_capture(self.canvas):
+            return False
+        resource_manager = title_page_generator.resource_manager
+        card_renderer = title_page_generator.card_renderer
+        with self.tracer.span("title_page"):
+            capture, _ = self.title_cache.get_capture(
+                resource_manager,
+                self.imposition,
+                title_page_generator.title,
+                title_page_generator.subtitle,
+                card_renderer.pattern_seed,
+                card_renderer.gradient_mode,
+            )
+            return self.draw_captured_title_page(capture, resource_manager)
+    
+    def draw_captured_title_page(self, capture, resource_manager):
+        """Draw a captured title page as a form XObject, or return False if not.
         
-            x = margin_x + col * style_manager.card_width
-            y = self.page_height - margin_y - (row + 1) * style_manager.card_height
+        The capture's text is only valid if this document's fonts have not
+        given the same character codes to other characters already.
+        """
+        replayer = PageReplayer(self.canvas, resource_manager)
+        if not replayer.merge_fonts(capture["fonts"]):
+            return False
+        page = dict(capture["pages"][0], bbox=[0, 0, self.page_width, self.page_height])
+        self.canvas.doForm(replayer.draw_form("TitlePage", page, capture["images"]))
+        return True
+    
+    def end_title_page(self):
+        """Finish the title page, with a blank back when printing duplex."""
+        self.canvas.showPage()
+        if self.imposition.duplex:
+            self.canvas.showPage()
+    
+    def get_imposition(self, style_manager):
+        """Return the imposition, resized if the style's cards are another size."""
+        card_size = (style_manager.card_width, style_manager.card_height)
+        self.imposition = self.imposition.for_card_size(card_size)
+        return self.imposition
+    
+    def iter_deck(self, card_data):
+        """Iterate over the deck's cards in print order."""
+        if self.group_by_category:
+            return card_data.iter_by_category()
+        return card_data.iter_cards()
+    
+    @traced("cards")
+    def draw_card_pages(self, cards, card_renderer, style_manager):
+        """Lay out cards on as many pages as needed and return the card count."""
+        imposition = self.get_imposition(style_manager)
+        slots = imposition.slots
         
-            card_renderer.draw_card(x, y, category, question)
+        card_count = 0
+        for i, (category, question) in enumerate(cards):
+            x, y = slots[i % imposition.cards_per_page]
+            self.place_card(
+                imposition, x, y, card_renderer.draw_card, category, question
+            )
         
-            if (i + 1) % self.cards_per_page == 0:
-                self.canvas.showPage()
+            card_count = i + 1
+            if card_count % imposition.cards_per_page == 0:
+                self.finish_sheet(imposition, card_renderer, imposition.cards_per_page)
         
         # Final page if needed
-        if len(cards) % self.cards_per_page != 0:
+        if card_count % imposition.cards_per_page != 0:
+            self.finish_sheet(
+                imposition, card_renderer, card_count % imposition.cards_per_page
+            )
+        return card_count
+    
+    def place_card(self, imposition, x, y, draw, *args):
+        """Draw a card into the slot at (x, y), turned if the imposition says so."""
+        if not imposition.rotated:
+            draw(x, y, *args)
+            return
+        # A quarter turn counter-clockwise about the card's origin puts its
+        # bottom edge on the slot's right-hand side
+        self.canvas.saveState()
+        self.canvas.translate(x + imposition.card_size[1], y)
+        self.canvas.rotate(90)
+        draw(0, 0, *args)
+        self.canvas.restoreState()
+    
+    def finish_sheet(self, imposition, card_renderer, card_count):
+        """End a page of card fronts, followed by its backs when printing duplex."""
+        self.canvas.showPage()
+        if imposition.duplex:
+            for x, y in imposition.back_slots[:card_count]:
+                self.place_card(imposition, x, y, card_renderer.draw_card_back)
             self.canvas.showPage()
-        
-        # Save the PDF
-        self.canvas.save()
-        print(f"✨ The Insect Asylum nature flashcards saved to: {os.path.abspath(self.output_file)}")
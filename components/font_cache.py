@@ -0,0 +1,132 @@
+import hashlib
+import marshal
+import os
+from fnmatch import fnmatch
+from weakref import WeakKeyDictionary
+from reportlab import Version as reportlab_version
+from reportlab import rl_config
+from reportlab.pdfbase.ttfonts import (
+    TTEncoding,
+    TTFNameBytes,
+    TTFont,
+    TTFontFace,
+    TTFOpenFile,
+)
+
+# Face attributes that are not metrics: the font file's bytes, which are
+# read again on load, the read position in them and the unit scaling closure
+SKIPPED_FACE_ATTRIBUTES = ("_ttf_data", "_pos", "_pdfScale")
+
+
+def find_font_file(font_file):
+    """Resolve a font file name using reportlab's TTF search path."""
+    path, f = TTFOpenFile(font_file)
+    f.close()
+    return os.path.abspath(path)
+
+
+def default_cache_dir(name):
+    """Return a per-user cache directory for one kind of cached data."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "tia-flashcards", name)
+
+
+def default_font_cache_dir():
+    """Return the per-user directory for cached font metrics."""
+    return default_cache_dir("fonts")
+
+
+class FontMetricsCache:
+    """Keeps the metric tables of parsed TrueType fonts on disk.
+
+    Only plain data is stored, in marshal format: the widths, ascent and
+    descent, bounding box, glyph maps and table directory reportlab parses
+    out of a font. The font file itself is read again on load, which is
+    cheap next to parsing it. Entries are keyed by the SHA-256 of the font
+    file, the reportlab version and the marshal format version.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_font_cache_dir()
+
+    def cache_path(self, digest):
+        """Return the cache file for a font file's digest."""
+        return os.path.join(
+            self.cache_dir,
+            f"{digest}-rl{reportlab_version}-m{marshal.version}.marshal",
+        )
+
+    def load_font(self, font_name, font_path):
+        """Return a TTFont for a file, from the cached metrics when possible."""
+        with open(font_path, "rb") as f:
+            font_data = f.read()
+        cache_path = self.cache_path(hashlib.sha256(font_data).hexdigest())
+        try:
+            # marshal.load reads a file in small pieces; one read is much faster
+            with open(cache_path, "rb") as f:
+                metrics = marshal.loads(f.read())
+            return self._restore_font(font_name, font_path, font_data, metrics)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable font cache {cache_path} ({e})")
+
+        font = TTFont(font_name, font_path)
+        self._store_metrics(cache_path, font.face)
+        return font
+
+    def _store_metrics(self, cache_path, face):
+        """Write a parsed font's metric tables to the cache, ignoring write failures."""
+        tables = {
+            name: value
+            for name, value in vars(face).items()
+            if name not in SKIPPED_FACE_ATTRIBUTES
+        }
+        metrics = {
+            "tables": tables,
+            # Name strings are a bytes subclass that marshal stores as bytes
+            "names": [
+                name
+                for name, value in tables.items()
+                if isinstance(value, TTFNameBytes)
+            ],
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(marshal.dumps(metrics))
+            os.replace(temp_path, cache_path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not cache font metrics ({e})")
+
+    def _restore_font(self, font_name, font_path, font_data, metrics):
+        """Rebuild a TTFont from cached metric tables without parsing the TTF."""
+        face = TTFontFace.__new__(TTFontFace)
+        face.__dict__.update(metrics["tables"])
+        for name in metrics["names"]:
+            setattr(face, name, TTFNameBytes(getattr(face, name)))
+        face.filename = font_path
+        face._ttf_data = font_data
+        face._pos = 0
+
+        # The scale function is a closure, so it is made again here
+        units_per_em = face.unitsPerEm
+        if units_per_em == 1000:
+            face._pdfScale = lambda x: x
+        else:
+            face._pdfScale = lambda x: x * (1000 / units_per_em)
+
+        # The rest of what TTFont.__init__ sets up besides parsing the face
+        font = TTFont.__new__(TTFont)
+        font.fontName = font_name
+        font.face = face
+        font.encoding = TTEncoding()
+        font.state = WeakKeyDictionary()
+        font._asciiReadable = rl_config.ttfAsciiReadable
+        font.shapable = not any(
+            fnmatch(font_name, pattern) for pattern in rl_config.unShapedFontGlob
+        )
+        return font
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+
+from PIL import Image, ImageChops
+
+from components.fingerprint import file_digest
+from components.font_cache import default_cache_dir
+
+# Part of every cache key; bump it when variants are produced differently
+PIPELINE_VERSION = 1
+
+
+def is_grayscale(image):
+    """Return whether an RGBA image has no color in it."""
+    red, green, blue, _ = image.split()
+    return (
+        ImageChops.difference(red, green).getbbox() is None
+        and ImageChops.difference(green, blue).getbbox() is None
+    )
+
+
+class ImageVariantCache:
+    """Resampled copies of an image for each size it is drawn at, kept on disk.
+
+    A PDF embeds an image at whatever resolution it is given, so drawing a
+    large source into a small box wastes space and time. Each placement
+    size gets its own copy at the target DPI instead. Copies without color
+    are stored as grayscale, and transparency stays in an alpha channel that
+    reportlab embeds as a separate soft mask. Files are named after a hash
+    of the source file's contents and the parameters, so an edited source
+    is resampled again automatically.
+    """
+
+    def __init__(self, cache_dir=None, dpi=300):
+        self.cache_dir = cache_dir or default_cache_dir("images")
+        self.dpi = dpi
+        self.source_digests = {}
+
+    def get_pixel_size(self, width, height):
+        """Return the pixel size for a placement size in points."""
+        scale = self.dpi / 72
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def get_source_digest(self, source_path):
+        """Return the digest of a source image, hashing it once per process."""
+        stat = os.stat(source_path)
+        key = (os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size)
+        digest = self.source_digests.get(key)
+        if digest is None:
+            digest = self.source_digests[key] = file_digest(source_path)
+        return digest
+
+    def variant_path(self, source_path, pixel_size):
+        """Return where the variant of a source at a pixel size is stored."""
+        description = [
+            PIPELINE_VERSION,
+            self.get_source_digest(source_path),
+            list(pixel_size),
+        ]
+        key = hashlib.sha256(json.dumps(description).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get_variant(self, source_path, width, height):
+        """Return the path of a copy of an image for drawing at width x height."""
+        pixel_size = self.get_pixel_size(width, height)
+        path = self.variant_path(source_path, pixel_size)
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            self._resample(source_path, pixel_size).save(
+                temp_path, format="PNG", optimize=True
+            )
+            os.replace(temp_path, path)
+        return path
+
+    def _resample(self, source_path, pixel_size):
+        """Resample a source image to a pixel size in the most compact mode."""
+        with Image.open(source_path) as source:
+            image = source.convert("RGBA")
+        # Reducing by whole factors first keeps huge sources quick to resample
+        image = image.resize(pixel_size, Image.LANCZOS, reducing_gap=3.0)
+        if is_grayscale(image):
+            image = image.convert("LA")
+        if image.getextrema()[-1] == (255, 255):
+            # Fully opaque, so no soft mask is needed
+            image = image.convert(image.mode[:-1])
+        return image
@@ -0,0 +1,138 @@
+from reportlab.lib.pagesizes import A4, letter
+from reportlab.lib.units import inch
+
+# Named sheet sizes for the command line, in points
+SHEET_SIZES = {
+    "letter": letter,
+    "a4": A4,
+    "12x18": (12 * inch, 18 * inch),
+    "13x19": (13 * inch, 19 * inch),
+}
+
+
+def parse_sheet_size(value):
+    """Return a sheet size in points from a name or a "WxH" size in inches."""
+    size = SHEET_SIZES.get(value.lower())
+    if size is None:
+        try:
+            width, height = (float(part) * inch for part in value.lower().split("x"))
+        except ValueError:
+            raise ValueError(f"Unknown sheet size: {value!r}") from None
+        size = (width, height)
+    return size
+
+
+class Imposition:
+    """Lays out cards on a sheet and precomputes the position of every slot.
+
+    As many cards as fit inside the margin are placed in a centered grid,
+    with a gutter between neighbouring cards and a bleed allowance around
+    each one. With allow_rotation the cards may be turned a quarter turn
+    when that fits more per sheet. Slots are listed in reading order,
+    top-left first; duplex back slots mirror them for a long-edge flip.
+    """
+
+    def __init__(
+        self,
+        page_size=letter,
+        card_size=(3.5 * inch, 2 * inch),
+        gutter=0,
+        bleed=0,
+        margin=0,
+        duplex=False,
+        allow_rotation=False,
+    ):
+        self.page_size = page_size
+        self.card_size = card_size
+        self.gutter = gutter
+        self.bleed = bleed
+        self.margin = margin
+        self.duplex = duplex
+        self.allow_rotation = allow_rotation
+
+        card_width, card_height = card_size
+        self.cols, self.rows = self.fit(card_width, card_height)
+        self.rotated = False
+        if allow_rotation:
+            cols, rows = self.fit(card_height, card_width)
+            if cols * rows > self.cols * self.rows:
+                self.cols, self.rows, self.rotated = cols, rows, True
+        if self.cols * self.rows == 0:
+            raise ValueError("A card does not fit on the sheet")
+        self.cards_per_page = self.cols * self.rows
+
+        self.slots = self._compute_slots()
+        self.back_slots = self._compute_back_slots()
+
+    def fit(self, slot_width, slot_height):
+        """Return how many (columns, rows) of a slot size fit on the sheet."""
+        page_width, page_height = self.page_size
+        pitch_x = slot_width + 2 * self.bleed + self.gutter
+        pitch_y = slot_height + 2 * self.bleed + self.gutter
+        # The last card in a row or column needs no gutter after it
+        cols = int((page_width - 2 * self.margin + self.gutter) // pitch_x)
+        rows = int((page_height - 2 * self.margin + self.gutter) // pitch_y)
+        return max(cols, 0), max(rows, 0)
+
+    @property
+    def slot_size(self):
+        """The (width, height) a card takes up on the sheet."""
+        card_width, card_height = self.card_size
+        if self.rotated:
+            return card_height, card_width
+        return card_width, card_height
+
+    def _compute_slots(self):
+        """Return the bottom-left corner of every card's trim box on the sheet."""
+        page_width, page_height = self.page_size
+        slot_width, slot_height = self.slot_size
+        pitch_x = slot_width + 2 * self.bleed + self.gutter
+        pitch_y = slot_height + 2 * self.bleed + self.gutter
+
+        # Center the whole block of cards on the sheet
+        block_width = self.cols * pitch_x - self.gutter
+        block_height = self.rows * pitch_y - self.gutter
+        left = (page_width - block_width) / 2 + self.bleed
+        top = page_height - (page_height - block_height) / 2 - self.bleed
+
+        return tuple(
+            (left + col * pitch_x, top - row * pitch_y - slot_height)
+            for row in range(self.rows)
+            for col in range(self.cols)
+        )
+
+    def _compute_back_slots(self):
+        """Return the back of each slot, mirrored left to right."""
+        page_width = self.page_size[0]
+        slot_width = self.slot_size[0]
+        return tuple((page_width - x - slot_width, y) for x, y in self.slots)
+
+    def resized(self, card_size):
+        """Return the same imposition for a different card size."""
+        return Imposition(
+            page_size=self.page_size,
+            card_size=card_size,
+            gutter=self.gutter,
+            bleed=self.bleed,
+            margin=self.margin,
+            duplex=self.duplex,
+            allow_rotation=self.allow_rotation,
+        )
+
+    def for_card_size(self, card_size):
+        """Return this imposition, or a resized copy if the card size differs."""
+        if self.card_size == card_size:
+            return self
+        return self.resized(card_size)
+
+    def describe(self):
+        """Return the settings that decide where cards go, for fingerprints."""
+        return [
+            list(self.page_size),
+            list(self.card_size),
+            self.gutter,
+            self.bleed,
+            self.margin,
+            self.duplex,
+            self.allow_rotation,
+        ]
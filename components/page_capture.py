@@ -0,0 +1,357 @@
+import hashlib
+import re
+
+from reportlab.pdfbase import pdfdoc, pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+# Names in a content stream that a document numbers as it goes: fonts (a
+# TrueType subset like /F3+0, or /F1 for a standard font), shadings and
+# XObjects. String literals are matched too, and skipped, so text that
+# happens to look like a name is left alone.
+RESOURCE_NAME = re.compile(
+    r"\((?:[^()\\]|\\.)*\)"
+    r"|/(F\d+(?:\+\d+)?|Sh\d+|FormXob\.[^\s/()<>\[\]{}%]+)(?=\s)",
+    re.S,
+)
+XOBJECT_PREFIX = pdfdoc.xObjectName("")
+
+
+def can_capture(canvas):
+    """Return whether a canvas has the internals that capture and replay use."""
+    doc = getattr(canvas, "_doc", None)
+    return all(
+        hasattr(doc, name)
+        for name in ("Pages", "idToObject", "fontMapping", "addShading")
+    ) and all(
+        hasattr(canvas, name)
+        for name in ("_code", "_formsinuse", "_shadingUsed", "_extgstate")
+    )
+
+
+def get_form_resources(canvas):
+    """Build the resource dictionary for the form a canvas is recording."""
+    # reportlab leaves ExtGState and shadings out of form resources, but
+    # transparent colors need their alpha states and gradients their shadings
+    resources = pdfdoc.PDFResourceDictionary()
+    resources.basicFonts()
+    resources.allProcs()
+    ext_gstate = canvas._extgstate.getState()
+    if ext_gstate:
+        resources.ExtGState = ext_gstate
+    resources.setShading(canvas._shadingUsed)
+    if canvas._formsinuse:
+        # Images such as the logo are XObjects too
+        resources.XObject = canvas._doc.xobjDict(canvas._formsinuse)
+    return resources
+
+
+def get_font_states(doc):
+    """Return the character codes each TrueType font has given out in a document.
+
+    Each font maps to [next code, subsets, assignments], the plain data of
+    reportlab's per-document font state.
+    """
+    states = {}
+    for font_name in doc.fontMapping:
+        font = pdfmetrics.getFont(font_name)
+        if not isinstance(font, TTFont):
+            continue
+        state = font.state.get(doc)
+        if state is not None:
+            states[font_name] = [
+                state.nextCode,
+                [list(subset) for subset in state.subsets],
+                dict(state.assignments),
+            ]
+    return states
+
+
+def capture_pages(canvas, first_page=0):
+    """Capture the finished pages of a canvas as plain, marshal-able data.
+
+    Returns a dict with "pages", one captured content stream per page from
+    first_page on, "images", the image XObjects they draw keyed by name, and
+    "fonts", the document's font states (see get_font_states). Resource
+    names that the document numbered are replaced by slots, so the pages
+    can be drawn into another document with a PageReplayer. Raises
+    ValueError for content it cannot capture.
+    """
+    capture = _PageCapture(canvas._doc)
+    pages = [
+        capture.capture_content(page.stream, page.ExtGState, page._colorsUsed)
+        for page in canvas._doc.Pages.pages[first_page:]
+    ]
+    return {
+        "pages": pages,
+        "images": capture.images,
+        "fonts": get_font_states(canvas._doc),
+    }
+
+
+class _PageCapture:
+    """Turns the content streams of one document into captured data."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.font_names = {
+            internal_name[1:]: font_name
+            for font_name, internal_name in doc.fontMapping.items()
+        }
+        self.images = {}
+
+    def capture_content(self, stream, ext_gstate, colors_used):
+        """Capture a page or form stream, minus reportlab's preamble."""
+        if colors_used:
+            raise ValueError("Pages with separation colors cannot be captured")
+        if isinstance(stream, bytes):
+            stream = stream.decode("latin-1")
+        code = stream.split("\n", 1)[1] if "\n" in stream else ""
+        if code.endswith("\n \n"):
+            # showPage ends every page with a blank line; it adds one again
+            code = code[:-3]
+
+        text, refs, slots, slot_indexes, forms = [], [], [], {}, {}
+        position = 0
+        for match in RESOURCE_NAME.finditer(code):
+            name = match.group(1)
+            if name is None:
+                continue
+            slot = self.get_slot(name, forms)
+            index = slot_indexes.get(slot)
+            if index is None:
+                index = slot_indexes[slot] = len(slots)
+                slots.append(slot)
+            text.append(code[position : match.start(1)])
+            refs.append(index)
+            position = match.end(1)
+        text.append(code[position:])
+
+        gstates = []
+        if ext_gstate:
+            for name, values in ext_gstate.dict.items():
+                ((key, value),) = values.dict.items()
+                gstates.append((name, key, value))
+        return {
+            "text": text,
+            "refs": refs,
+            "slots": slots,
+            "gstates": gstates,
+            "forms": forms,
+        }
+
+    def get_slot(self, name, forms):
+        """Describe the resource a document-numbered name stands for."""
+        if name.startswith("Sh"):
+            return self.get_shading_slot(self.doc.idToObject[name])
+        if name.startswith(XOBJECT_PREFIX):
+            xobject = self.doc.idToObject[name]
+            name = name[len(XOBJECT_PREFIX) :]
+            if isinstance(xobject, pdfdoc.PDFImageXObject):
+                self.capture_image(name, xobject)
+                return ("image", name)
+            if isinstance(xobject, pdfdoc.PDFFormXObject):
+                if name not in forms:
+                    form = self.capture_content(
+                        xobject.stream, xobject.ExtGState, xobject._colorsUsed
+                    )
+                    form["bbox"] = xobject.BBoxList()
+                    forms[name] = form
+                return ("form", name)
+            raise ValueError(f"Cannot capture XObject {name!r}")
+        internal_name, _, subset = name.partition("+")
+        return ("font", self.font_names[internal_name], int(subset) if subset else -1)
+
+    def get_shading_slot(self, shading):
+        """Describe an axial shading with an exponential function, as gradients use."""
+        function = getattr(shading, "Function", None)
+        if not (
+            isinstance(shading, pdfdoc.PDFAxialShading)
+            and isinstance(function, pdfdoc.PDFExponentialFunction)
+            and not function.otherkw
+        ):
+            raise ValueError(f"Cannot capture shading {shading!r}")
+        return (
+            "shading",
+            tuple(shading.Coords),
+            tuple(function.C0),
+            tuple(function.C1),
+            function.N,
+            shading.ColorSpace,
+            tuple(sorted(shading.otherkw.items())),
+        )
+
+    def capture_image(self, name, image):
+        """Record an image XObject and its soft mask under content-derived names."""
+        if name in self.images:
+            return
+        smask = getattr(image, "smask", None)
+        if smask is not None:
+            smask = smask.name[len(XOBJECT_PREFIX) :]
+            self.capture_image(smask, self.doc.idToObject[XOBJECT_PREFIX + smask])
+        self.images[name] = {
+            "width": image.width,
+            "height": image.height,
+            "bits": image.bitsPerComponent,
+            "color_space": image.colorSpace,
+            "filters": tuple(image._filters),
+            "content": image.streamContent,
+            "mask": tuple(image.mask) if image.mask else None,
+            "decode": tuple(getattr(image, "_decode", None) or ()),
+            "invert_cmyk": getattr(image, "_dotrans", 0),
+            "smask": smask,
+        }
+
+
+class PageReplayer:
+    """Draws captured pages and forms into a canvas.
+
+    Fonts, images, shadings and forms are added to the canvas's document
+    once and shared by everything replayed into it. Captured text is only
+    valid in a document whose fonts gave out the same character codes, so
+    merge_fonts must accept the capture's font states before it is drawn.
+    """
+
+    def __init__(self, canvas, resource_manager):
+        self.canvas = canvas
+        self.doc = canvas._doc
+        self.resource_manager = resource_manager
+        self.shadings = {}
+        self.forms = {}
+
+    def get_font(self, font_name):
+        """Return a registered font object by name."""
+        return pdfmetrics.getFont(self.resource_manager.get_font(font_name))
+
+    def merge_fonts(self, fonts):
+        """Take on the character codes of captured font states.
+
+        Codes are given out in order, so of two states from the same line
+        of documents one extends the other. Returns False, changing nothing,
+        if a captured state contradicts the document's.
+        """
+        updates = []
+        for font_name, (next_code, subsets, assignments) in fonts.items():
+            font = self.get_font(font_name)
+            state = font.state.get(self.doc)
+            if state is None:
+                state = font.state[self.doc] = TTFont.State(font._asciiReadable, font)
+            if next_code > state.nextCode:
+                shorter, longer = state.assignments, assignments
+            else:
+                shorter, longer = assignments, state.assignments
+            if state.frozen or any(
+                longer.get(char) != code for char, code in shorter.items()
+            ):
+                return False
+            if next_code > state.nextCode:
+                updates.append((state, next_code, subsets, assignments))
+
+        for state, next_code, subsets, assignments in updates:
+            state.nextCode = next_code
+            state.subsets = [list(subset) for subset in subsets]
+            state.assignments = dict(assignments)
+        return True
+
+    def draw_page(self, content, images):
+        """Draw captured content as the whole of the current page, then end it."""
+        if self.canvas._code:
+            raise ValueError("A captured page must be drawn on an empty page")
+        self.draw(content, images)
+        self.canvas.showPage()
+
+    def draw_form(self, name, content, images):
+        """Record captured content as a form XObject and return the form's name."""
+        # marshal's output depends on how its input was built, so equal
+        # captures are compared by their repr
+        key = hashlib.sha256(repr(content).encode("utf-8")).digest()
+        form_name = self.forms.get(key)
+        if form_name is None:
+            form_name = name
+            number = 1
+            while self.doc.hasForm(form_name):
+                number += 1
+                form_name = f"{name}{number}"
+            self.canvas.beginForm(form_name, *content["bbox"])
+            self.draw(content, images)
+            self.canvas.endForm(Resources=get_form_resources(self.canvas))
+            self.forms[key] = form_name
+        return form_name
+
+    def draw(self, content, images):
+        """Append captured content to the page or form being recorded."""
+        # Forms are recorded first: recording one swaps out the accumulators
+        # of the page or form being drawn
+        form_names = {
+            name: self.draw_form(name, form, images)
+            for name, form in content["forms"].items()
+        }
+        canvas = self.canvas
+        names = []
+        for slot in content["slots"]:
+            kind = slot[0]
+            if kind == "font":
+                _, font_name, subset = slot
+                if subset < 0:
+                    name = self.doc.getInternalFontName(font_name)
+                else:
+                    name = self.get_font(font_name).getSubsetInternalName(
+                        subset, self.doc
+                    )
+                names.append(name[1:])
+            elif kind == "shading":
+                name = self.get_shading(slot)
+                canvas._shadingUsed[name] = name
+                names.append(name)
+            else:
+                name = slot[1]
+                if kind == "image":
+                    self.add_image(name, images)
+                else:
+                    name = form_names[name]
+                canvas._formsinuse.append(name)
+                names.append(XOBJECT_PREFIX + name)
+
+        parts = [content["text"][0]]
+        for index, text in zip(content["refs"], content["text"][1:]):
+            parts.append(names[index])
+            parts.append(text)
+        canvas._code.append("".join(parts))
+
+        # Alpha states are named per page or form, so the captured names are
+        # kept as they are
+        for name, key, value in content["gstates"]:
+            canvas._extgstate._c[(key, value)] = name
+
+    def get_shading(self, slot):
+        """Return the document's name for a captured shading, adding it once."""
+        name = self.shadings.get(slot)
+        if name is None:
+            _, coords, start, end, exponent, color_space, options = slot
+            function = pdfdoc.PDFExponentialFunction(C0=start, C1=end, N=exponent)
+            shading = pdfdoc.PDFAxialShading(
+                *coords, Function=function, ColorSpace=color_space, **dict(options)
+            )
+            name = self.shadings[slot] = self.doc.addShading(shading)
+        return name
+
+    def add_image(self, name, images):
+        """Add a captured image XObject to the document unless it is there already."""
+        if self.doc.hasForm(name):
+            return
+        captured = images[name]
+        image = pdfdoc.PDFImageXObject(name)
+        image.width = captured["width"]
+        image.height = captured["height"]
+        image.bitsPerComponent = captured["bits"]
+        image.colorSpace = captured["color_space"]
+        image._filters = captured["filters"]
+        image.streamContent = captured["content"]
+        image.mask = captured["mask"]
+        if captured["decode"]:
+            image._decode = list(captured["decode"])
+        if captured["invert_cmyk"]:
+            image._dotrans = captured["invert_cmyk"]
+        if captured["smask"]:
+            self.add_image(captured["smask"], images)
+            image.smask = pdfdoc.PDFObjectReference(XOBJECT_PREFIX + captured["smask"])
+        self.doc.addForm(name, image)
@@ -0,0 +1,112 @@
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.title_page_generator import DEFAULT_SUBTITLE, DEFAULT_TITLE
+from components.title_page_cache import TitlePageCache
+from components.pdf_merge import merge_pdfs
+from components.render_workers import (
+    get_imposition,
+    init_worker,
+    iter_deck,
+    iter_page_groups,
+    render_cards,
+)
+
+
+class ParallelRenderer:
+    """Renders a deck on a process pool and merges the partial PDFs in order."""
+
+    def __init__(
+        self,
+        output_file="nature_flashcards_premium.pdf",
+        workers=None,
+        pages_per_chunk=25,
+        logo_path="insect_asylum_logo.png",
+        logo_dpi=300,
+        invariant=False,
+        group_by_category=False,
+        imposition=None,
+        title=DEFAULT_TITLE,
+        subtitle=DEFAULT_SUBTITLE,
+        title_cache_dir=None,
+        style_overrides=None,
+        **renderer_options,
+    ):
+        self.output_file = output_file
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_chunk = pages_per_chunk
+        self.logo_path = logo_path
+        self.logo_dpi = logo_dpi
+        self.invariant = invariant
+        self.group_by_category = group_by_category
+        self.imposition = get_imposition(
+            imposition, StyleManager.from_overrides(style_overrides)
+        )
+        self.title = title
+        self.subtitle = subtitle
+        self.title_cache = TitlePageCache(title_cache_dir)
+        self.style_overrides = style_overrides or {}
+
+        # Passed through to each worker's CardRenderer
+        self.renderer_options = renderer_options
+
+    def iter_chunks(self, card_data):
+        """Split the deck into lists of cards that fill whole pages."""
+        return iter_page_groups(
+            iter_deck(card_data, self.group_by_category),
+            self.imposition.cards_per_page,
+            self.pages_per_chunk,
+        )
+
+    def generate_cards(self, card_data):
+        """Generate the PDF with title page and cards."""
+        # Keep a few chunks queued per worker, but not the whole deck
+        max_pending = self.workers * 2
+
+        with tempfile.TemporaryDirectory(
+            dir=os.path.dirname(os.path.abspath(self.output_file))
+        ) as chunk_dir, ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(
+                self.logo_path,
+                self.logo_dpi,
+                self.style_overrides,
+                self.renderer_options,
+                self.invariant,
+                self.imposition,
+            ),
+        ) as pool:
+            chunk_files = []
+            pending = deque()
+
+            for i, chunk in enumerate(self.iter_chunks(card_data)):
+                chunk_file = os.path.join(chunk_dir, f"chunk{i:06d}.pdf")
+                pending.append(pool.submit(render_cards, chunk_file, chunk))
+                if len(pending) >= max_pending:
+                    chunk_files.append(pending.popleft().result())
+
+            # The title page comes from the cache shared by every build with
+            # the same branding. It is fetched while the workers are busy with
+            # the last chunks, and only rendered when it is missing.
+            if self.renderer_options.get("fidelity") != "draft":
+                title_file, _ = self.title_cache.get_page(
+                    ResourceManager(logo_path=self.logo_path, logo_dpi=self.logo_dpi),
+                    self.imposition,
+                    self.title,
+                    self.subtitle,
+                    self.renderer_options.get("pattern_seed", 0),
+                    self.renderer_options.get("gradient_mode", "shading"),
+                )
+                chunk_files.insert(0, title_file)
+
+            while pending:
+                chunk_files.append(pending.popleft().result())
+
+            merge_pdfs(chunk_files, self.output_file)
+
+        print(f"✨ The Insect Asylum nature flashcards saved to: {os.path.abspath(self.output_file)}")
@@ -0,0 +1,102 @@
+import random
+import zlib
+from collections import OrderedDict
+from reportlab.pdfgen.pathobject import PDFPathObject
+
+
+def derive_pattern_seed(base_seed, *parts):
+    """Derive a stable dot pattern seed from a base seed and some text."""
+    key = "\x1f".join([str(base_seed), *parts])
+    return zlib.crc32(key.encode("utf-8"))
+
+
+class DotPatternGenerator:
+    """Computes jittered dot grids in bulk and caches their drawing code."""
+
+    def __init__(self, spacing=15, dot_size=1.5, jitter=2, cache_size=256):
+        self.spacing = spacing
+        self.dot_size = dot_size
+        self.jitter = jitter
+        self.cache_size = cache_size
+        self.code_cache = OrderedDict()
+
+        # Every dot is the same circle, so its Bezier control points are
+        # offsets from the centre taken from one circle drawn at the origin.
+        # They only take a few distinct values per axis, so each dot adds
+        # those to its centre and fills them into a template of the circle's
+        # operators.
+        dot = PDFPathObject()
+        dot.circle(0, 0, dot_size)
+        tokens = dot.getCode().split()[1:]
+        numbers = [float(token) for token in tokens if token not in ("m", "c")]
+        self.dot_offsets = sorted(set(numbers))
+        count = len(self.dot_offsets)
+        template = []
+        k = 0
+        for token in tokens:
+            if token in ("m", "c"):
+                template.append(token)
+                continue
+            # Coordinates alternate x, y; y values come after the x values
+            index = self.dot_offsets.index(numbers[k]) + (count if k % 2 else 0)
+            template.append(f"{{{index}:.2f}}")
+            k += 1
+        self.dot_template = " ".join(template)
+
+    def get_dots(self, width, height, seed=None):
+        """Return the dot centres for an area, relative to its bottom-left corner."""
+        cols = int(width / self.spacing)
+        rows = int(height / self.spacing)
+
+        # Draw every x/y jitter offset in one pass from a private generator
+        rng = random.Random(seed)
+        jitter = self.jitter
+        offsets = [rng.uniform(-jitter, jitter) for _ in range(2 * cols * rows)]
+
+        dots = []
+        k = 0
+        for i in range(cols):
+            base_x = i * self.spacing
+            for j in range(rows):
+                dot_x = base_x + offsets[k]
+                dot_y = j * self.spacing + offsets[k + 1]
+                k += 2
+
+                # Only keep dots that land inside the area
+                if 0 < dot_x < width and 0 < dot_y < height:
+                    dots.append((dot_x, dot_y))
+        return dots
+
+    def build_code(self, dots):
+        """Return content stream code that fills every dot as one path."""
+        if not dots:
+            return ""
+        offsets = self.dot_offsets
+        template = self.dot_template.format
+        subpaths = [
+            template(
+                *[x + offset for offset in offsets],
+                *[y + offset for offset in offsets],
+            )
+            for x, y in dots
+        ]
+        # Every dot is a closed subpath, so one fill covers them all
+        subpaths.append("f")
+        return "\n".join(subpaths)
+
+    def get_code(self, width, height, seed=None):
+        """Return the dot pattern code for an area, reusing it for repeated seeds."""
+        if seed is None:
+            # Unseeded patterns are never repeated, so don't cache them
+            return self.build_code(self.get_dots(width, height, random.random()))
+
+        key = (width, height, seed)
+        code = self.code_cache.get(key)
+        if code is None:
+            code = self.build_code(self.get_dots(width, height, seed))
+            self.code_cache[key] = code
+            if len(self.code_cache) > self.cache_size:
+                self.code_cache.popitem(last=False)
+        else:
+            self.code_cache.move_to_end(key)
+        return code
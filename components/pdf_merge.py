@@ -0,0 +1,50 @@
+def _drop_font_names(resources, seen):
+    """Remove the optional /Name from the fonts in a resource dict and its forms."""
+    if resources is None or id(resources) in seen:
+        return
+    seen.add(id(resources))
+    for font in resources.get("/Font", {}).values():
+        font.get_object().pop("/Name", None)
+    for xobject in resources.get("/XObject", {}).values():
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") == "/Form":
+            _drop_font_names(xobject.get("/Resources"), seen)
+
+
+def merge_pdfs(input_files, output_file):
+    """Concatenate PDFs in order, sharing identical fonts, images and other resources.
+
+    Requires the optional pypdf package.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise RuntimeError(
+            "Merging PDFs requires the pypdf package (pip install pypdf)"
+        ) from None
+
+    writer = PdfWriter()
+    for input_file in input_files:
+        writer.append(input_file)
+
+    # reportlab names each font after the order it was first used in, so
+    # the same font subset is /F1+0 in one partial PDF and /F3+0 in the
+    # next. Pages find fonts by their resource keys and the /Name entry is
+    # optional, so it is dropped to let identical fonts be shared.
+    seen = set()
+    for page in writer.pages:
+        _drop_font_names(page.get("/Resources"), seen)
+
+    # Each partial PDF embeds its own copy of shared resources; keep one.
+    # Objects only become identical once the objects they refer to have
+    # been merged: soft masks before the logo, and font files before their
+    # descriptors before the fonts, so a few passes are needed.
+    for _ in range(3):
+        writer.compress_identical_objects()
+
+    if hasattr(output_file, "write"):
+        writer.write(output_file)
+    else:
+        with open(output_file, "wb") as f:
+            writer.write(f)
+    writer.close()
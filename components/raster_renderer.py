@@ -0,0 +1,389 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+from components.card_data import CardData
+from components.card_renderer import FIDELITY_LEVELS
+from components.pattern_generator import DotPatternGenerator, derive_pattern_seed
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.text_layout import TextLayout
+
+# Space around the card for its shadow, in points
+CARD_MARGIN = 5
+
+
+def to_rgba(color):
+    """Convert a reportlab color to an 8-bit RGBA tuple."""
+    red, green, blue, alpha = color.rgba()
+    return (
+        round(red * 255),
+        round(green * 255),
+        round(blue * 255),
+        round(alpha * 255),
+    )
+
+
+class RasterCardRenderer:
+    """Draws the card design from CardRenderer into Pillow images.
+
+    Layout, colors and typography come from the same StyleManager and text
+    metrics as the PDF, so a preview matches the printed card. Cards are
+    drawn at supersample times the requested resolution and then reduced,
+    which antialiases shapes that Pillow would otherwise draw hard-edged.
+    """
+
+    def __init__(
+        self,
+        style_manager,
+        resource_manager,
+        use_templates=False,
+        pattern_seed=0,
+        gradient_mode="shading",
+        fidelity="final",
+        supersample=2,
+    ):
+        if fidelity not in FIDELITY_LEVELS:
+            raise ValueError(f"Unknown fidelity level: {fidelity!r}")
+
+        self.style_manager = style_manager
+        self.resource_manager = resource_manager
+        self.use_templates = use_templates
+        self.pattern_seed = pattern_seed
+        self.gradient_mode = gradient_mode
+        self.fidelity = fidelity
+        self.supersample = supersample
+        self.pattern_generator = DotPatternGenerator()
+        self.text_layout = TextLayout(resource_manager)
+
+        # Sized resources, reused for every card drawn at the same scale
+        self.fonts = {}
+        self.gradients = {}
+        self.scaled_logos = {}
+        self.logo = None
+        self.compiled_styles = {}
+
+    def get_style(self, category):
+        """Return the CompiledStyle for a category."""
+        style = self.compiled_styles.get(category)
+        if style is None:
+            style = self.style_manager.compile_style(category, self.text_layout)
+            self.compiled_styles[category] = style
+        return style
+
+    def get_font(self, font_name, size):
+        """Return a Pillow font for one of our fonts at a size in pixels."""
+        key = (font_name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if font_name not in self.resource_manager.FONT_FILES:
+                font_name = "DejaVuSans"
+            font_path = self.resource_manager.get_font_path(font_name)
+            font = ImageFont.truetype(font_path, size)
+            self.fonts[key] = font
+        return font
+
+    def get_gradient(self, start_color, end_color, size):
+        """Return a vertical gradient image, start color at the bottom."""
+        key = (start_color.rgb(), end_color.rgb(), size)
+        gradient = self.gradients.get(key)
+        if gradient is None:
+            # linear_gradient runs from 0 at the top to 255 at the bottom
+            mask = Image.linear_gradient("L")
+            if self.gradient_mode == "stepped":
+                # The same 15 bands the PDF draws as stacked rectangles
+                mask = mask.resize((1, 15), Image.BILINEAR).resize(size, Image.NEAREST)
+            else:
+                mask = mask.resize(size, Image.BILINEAR)
+            start = Image.new("RGB", size, to_rgba(start_color)[:3])
+            end = Image.new("RGB", size, to_rgba(end_color)[:3])
+            gradient = Image.composite(start, end, mask)
+            self.gradients[key] = gradient
+        return gradient
+
+    def get_logo(self, size):
+        """Return the logo scaled to a size in pixels, or None without a logo."""
+        if self.logo is None:
+            try:
+                logo_path = self.resource_manager.logo_path
+                self.logo = Image.open(logo_path).convert("RGBA")
+            except Exception as e:
+                print(f"Warning: Could not load logo ({e})")
+                self.logo = False
+        if self.logo is False:
+            return None
+
+        logo = self.scaled_logos.get(size)
+        if logo is None:
+            logo = self.logo.resize(size, Image.LANCZOS)
+            self.scaled_logos[size] = logo
+        return logo
+
+    def draw_card(self, category, question, dpi=150):
+        """Return an RGB image of a card and its shadow at a resolution."""
+        card_width = self.style_manager.card_width
+        card_height = self.style_manager.card_height
+        header_height = self.style_manager.header_height
+        style = self.get_style(category)
+        final = self.fidelity == "final"
+        draft = self.fidelity == "draft"
+
+        scale = dpi / 72 * self.supersample
+        top = card_height + CARD_MARGIN
+
+        def px(x):
+            return (x + CARD_MARGIN) * scale
+
+        def py(y):
+            return (top - y) * scale
+
+        def box(x0, y0, x1, y1):
+            return [px(x0), py(y1), px(x1), py(y0)]
+
+        size = (
+            round((card_width + 2 * CARD_MARGIN) * scale),
+            round((card_height + 2 * CARD_MARGIN) * scale),
+        )
+        image = Image.new("RGB", size, "white")
+        # RGBA drawing blends translucent colors into the image
+        draw = ImageDraw.Draw(image, "RGBA")
+
+        # Shadow, then the border stroke centred on the card edge
+        if final:
+            draw.rounded_rectangle(
+                box(4, -4, card_width + 4, card_height - 4),
+                radius=10 * scale,
+                fill=to_rgba(style.shadow_color),
+            )
+        draw.rounded_rectangle(
+            box(-1.5, -1.5, card_width + 1.5, card_height + 1.5),
+            radius=11.5 * scale,
+            outline=to_rgba(style.border_color),
+            width=round(3 * scale),
+        )
+
+        # Gradient background
+        if not draft:
+            left, upper, right, lower = [
+                round(v) for v in box(1, 1, card_width - 1, card_height - 1)
+            ]
+            gradient = self.get_gradient(
+                style.gradient_start,
+                style.gradient_end,
+                (right - left, lower - upper),
+            )
+            image.paste(gradient, (left, upper))
+
+        # Dot pattern
+        if final:
+            if self.use_templates:
+                seed = derive_pattern_seed(self.pattern_seed, category)
+            else:
+                seed = derive_pattern_seed(self.pattern_seed, category, question)
+            dot_color = to_rgba(style.pattern_color)
+            dot_size = self.pattern_generator.dot_size
+            dots = self.pattern_generator.get_dots(
+                card_width - 20, card_height - 20, seed
+            )
+            for dot_x, dot_y in dots:
+                draw.ellipse(
+                    box(
+                        10 + dot_x - dot_size,
+                        10 + dot_y - dot_size,
+                        10 + dot_x + dot_size,
+                        10 + dot_y + dot_size,
+                    ),
+                    fill=dot_color,
+                )
+
+        # Corner accents
+        border = to_rgba(style.border_color)
+        accent_width = max(1, round(1.5 * scale))
+        w, h, s = card_width, card_height, 10
+        if not draft:
+            for x0, y0, x1, y1 in (
+                (5, h - 5, 5 + s, h - 5),
+                (5, h - 5, 5, h - 5 - s),
+                (w - 5, h - 5, w - 5 - s, h - 5),
+                (w - 5, h - 5, w - 5, h - 5 - s),
+                (5, 5, 5 + s, 5),
+                (5, 5, 5, 5 + s),
+                (w - 5, 5, w - 5 - s, 5),
+                (w - 5, 5, w - 5, 5 + s),
+            ):
+                draw.line(
+                    [px(x0), py(y0), px(x1), py(y1)], fill=border, width=accent_width
+                )
+
+        # Header band and its title with a drop shadow
+        draw.rectangle(
+            box(5, h - header_height - 5, w - 5, h - 5),
+            fill=to_rgba(style.header),
+        )
+        font = self.get_font(style.header_font, round(style.header_size * scale))
+        text_x = style.header_text_x
+        text_y = style.header_text_y
+        if not draft:
+            draw.text(
+                (px(text_x + 1), py(text_y - 1)),
+                category,
+                font=font,
+                fill=to_rgba(colors.Color(0, 0, 0, 0.3)),
+                anchor="ls",
+            )
+        draw.text(
+            (px(text_x), py(text_y)),
+            category,
+            font=font,
+            fill=to_rgba(colors.navy),
+            anchor="ls",
+        )
+
+        # Divider with a dot at each end
+        divider_y = h - header_height - 12
+        draw.line(
+            [px(15), py(divider_y), px(w - 15), py(divider_y)],
+            fill=border,
+            width=max(1, round(scale)),
+        )
+        for dot_x in (15, w - 15):
+            draw.ellipse(
+                box(dot_x - 2, divider_y - 2, dot_x + 2, divider_y + 2), fill=border
+            )
+
+        # Question text, laid out exactly as in the PDF
+        question_font = style.question_font
+        question_size = style.question_size
+        lines = self.text_layout.wrap(question, question_font, question_size, w - 20)
+        font = self.get_font(question_font, round(question_size * scale))
+        text_color = to_rgba(style.text_color)
+        start_y = (h - header_height) / 2 + (len(lines) * 8) - 5
+        for i, (line, line_width) in enumerate(lines):
+            draw.text(
+                (px((w - line_width) / 2), py(start_y - i * 18)),
+                line,
+                font=font,
+                fill=text_color,
+                anchor="ls",
+            )
+
+        # Logo below the text, or the text fallback without one
+        last_line_y = start_y - (len(lines) - 1) * 18
+        logo_size = 0.7 * inch
+        logo_x = (w - logo_size) / 2
+        logo_y = max(min(18, last_line_y - 25 - logo_size), 10)
+        if draft:
+            # Outline the logo's place, as the draft PDF does
+            draw.rectangle(
+                box(logo_x, logo_y, logo_x + logo_size, logo_y + logo_size),
+                outline=border,
+                width=max(1, round(0.5 * scale)),
+            )
+        else:
+            logo = self.get_logo((round(logo_size * scale), round(logo_size * scale)))
+            if logo is not None:
+                left, upper = round(px(logo_x)), round(py(logo_y + logo_size))
+                image.paste(logo, (left, upper), logo)
+            else:
+                text = "THE INSECT ASYLUM"
+                text_width = self.text_layout.string_width(text, "DejaVuSans-Bold", 7)
+                draw.text(
+                    (px((w - text_width) / 2), py(20)),
+                    text,
+                    font=self.get_font("DejaVuSans-Bold", round(7 * scale)),
+                    fill=border,
+                    anchor="ls",
+                )
+
+        if self.supersample > 1:
+            image = image.reduce(self.supersample)
+        return image
+
+
+# Renderer for this worker process, created by _init_worker
+_worker_renderer = None
+
+
+def _init_worker(logo_path, style_overrides, renderer_options):
+    """Build the raster renderer once for this worker process."""
+    global _worker_renderer
+    style_manager = StyleManager()
+    style_manager.apply_overrides(style_overrides)
+    _worker_renderer = RasterCardRenderer(
+        style_manager, ResourceManager(logo_path=logo_path), **renderer_options
+    )
+
+
+def _render_chunk(cards, output_dir, dpis):
+    """Render numbered cards at every resolution and return the files written."""
+    paths = []
+    for index, category, question in cards:
+        for dpi in dpis:
+            path = os.path.join(output_dir, f"card-{index:05d}-{dpi}dpi.png")
+            _worker_renderer.draw_card(category, question, dpi).save(path)
+            paths.append(path)
+    return paths
+
+
+class PreviewExporter:
+    """Writes a PNG preview of every card at one or more resolutions."""
+
+    def __init__(
+        self,
+        output_dir,
+        dpis=(150,),
+        workers=None,
+        cards_per_chunk=50,
+        logo_path="insect_asylum_logo.png",
+        style_overrides=None,
+        **renderer_options,
+    ):
+        self.output_dir = output_dir
+        self.dpis = tuple(dpis)
+        self.workers = workers
+        self.cards_per_chunk = cards_per_chunk
+        self.logo_path = logo_path
+        self.style_overrides = style_overrides or {}
+        self.renderer_options = renderer_options
+
+    def iter_chunks(self, card_data):
+        """Yield numbered cards in chunks for the worker pool."""
+        chunk = []
+        for index, (category, question) in enumerate(card_data.iter_cards(), start=1):
+            chunk.append((index, category, question))
+            if len(chunk) == self.cards_per_chunk:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def export(self, card_data=None):
+        """Render every card in parallel and return the number of files written."""
+        card_data = card_data or CardData()
+        os.makedirs(self.output_dir, exist_ok=True)
+        workers = self.workers or os.cpu_count() or 1
+
+        file_count = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.logo_path, self.style_overrides, self.renderer_options),
+        ) as pool:
+            # Keep a bounded number of chunks queued so huge decks are never
+            # held in memory all at once
+            pending = deque()
+            for chunk in self.iter_chunks(card_data):
+                pending.append(
+                    pool.submit(_render_chunk, chunk, self.output_dir, self.dpis)
+                )
+                if len(pending) >= workers * 2:
+                    file_count += len(pending.popleft().result())
+            while pending:
+                file_count += len(pending.popleft().result())
+        output_dir = os.path.abspath(self.output_dir)
+        print(f"🖼️  {file_count} card previews saved to: {output_dir}")
+        return file_count
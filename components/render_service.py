@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import io
+import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from components.batch_runner import _init_worker, run_job
+from components.card_renderer import FIDELITY_LEVELS
+from components.imposition import Imposition
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+
+# Request fields that change the rendered PDF, besides the cards themselves
+RENDER_OPTIONS = (
+    "styles",
+    "templates",
+    "seed",
+    "group_by_category",
+    "stepped_gradients",
+    "fidelity",
+)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+def check_styles(styles):
+    """Raise ValueError for style overrides that would fail during rendering."""
+    style_manager = StyleManager.from_overrides(styles)
+    for typography in style_manager.typography.values():
+        for key in ("header_font", "question_font"):
+            if typography[key] not in ResourceManager.FONT_FILES:
+                raise ValueError(f"Unknown font: {typography[key]!r}")
+    # Cards too big for the sheet are only found by laying them out
+    Imposition().for_card_size((style_manager.card_width, style_manager.card_height))
+
+
+class RequestError(Exception):
+    """A request the service cannot handle, with its HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_render_request(body):
+    """Validate a JSON render request and return the job it describes.
+
+    The body is an object with a "cards" list of [category, question]
+    pairs or {"category": ..., "question": ...} objects, plus the optional
+    render options the batch runner accepts ("styles", "templates",
+    "seed", "group_by_category", "stepped_gradients" and "fidelity").
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise RequestError(400, f"Invalid JSON ({e})") from None
+    if not isinstance(payload, dict) or not isinstance(payload.get("cards"), list):
+        raise RequestError(400, 'Expected an object with a "cards" list')
+
+    cards = []
+    for i, card in enumerate(payload["cards"]):
+        if isinstance(card, dict):
+            card = (card.get("category"), card.get("question"))
+        if (
+            not isinstance(card, (list, tuple))
+            or len(card) != 2
+            or not all(isinstance(part, str) for part in card)
+        ):
+            raise RequestError(400, f"Card {i} is not a category and a question")
+        cards.append(tuple(card))
+
+    job = {key: payload[key] for key in RENDER_OPTIONS if key in payload}
+    if job.get("fidelity", "final") not in FIDELITY_LEVELS:
+        raise RequestError(400, f"Unknown fidelity level: {job['fidelity']!r}")
+    try:
+        # Check the overrides here so a bad style is the client's error
+        check_styles(job.get("styles", {}))
+    except (ValueError, TypeError, AttributeError, KeyError) as e:
+        raise RequestError(400, f"Invalid styles ({e})") from None
+    job["cards"] = cards
+    # Output is invariant so the same request always gives the same bytes
+    job["invariant"] = True
+    return job
+
+
+def get_job_key(job):
+    """Return a hash of everything in a job that affects its PDF."""
+    canonical = json.dumps(job, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _render_to_bytes(job, logo_path):
+    """Render a job in a pool worker and return the PDF bytes."""
+    output = io.BytesIO()
+    run_job(dict(job, output=output), logo_path)
+    return output.getvalue()
+
+
+class ResultCache:
+    """LRU cache of rendered PDFs, bounded by their total size."""
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a cached PDF or None, counting the hit or miss."""
+        pdf = self.entries.get(key)
+        if pdf is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return pdf
+
+    def put(self, key, pdf):
+        """Cache a PDF, evicting the least recently used ones to fit."""
+        if len(pdf) > self.max_bytes or key in self.entries:
+            return
+        self.entries[key] = pdf
+        self.size += len(pdf)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self):
+        """Return entry, size and hit counts."""
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class RenderService:
+    """Localhost HTTP service that renders decks on a pool of warm workers.
+
+    POST /render with a JSON deck returns the PDF; identical requests are
+    answered from the result cache, and concurrent identical requests share
+    one render. GET /health reports the cache statistics.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=8765,
+        workers=None,
+        logo_path="insect_asylum_logo.png",
+        cache_bytes=256 * 2**20,
+        max_request_bytes=16 * 2**20,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.logo_path = logo_path
+        self.max_request_bytes = max_request_bytes
+        self.cache = ResultCache(cache_bytes)
+        self.in_flight = {}
+        self.pool = None
+
+    def serve_forever(self):
+        """Run the service until interrupted."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self):
+        """Start the worker pool and handle connections until cancelled."""
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.logo_path,),
+        ) as self.pool:
+            server = await asyncio.start_server(
+                self.handle_connection, self.host, self.port
+            )
+            async with server:
+                print(f"🌿 Rendering service on http://{self.host}:{self.port}")
+                await server.serve_forever()
+
+    async def render(self, job):
+        """Return the PDF for a job from the cache, a pending render or a worker."""
+        key = get_job_key(job)
+        pdf = self.cache.get(key)
+        if pdf is not None:
+            return pdf, "hit"
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending), "shared"
+
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(
+            self.pool, _render_to_bytes, job, self.logo_path
+        )
+        self.in_flight[key] = pending
+        try:
+            pdf = await asyncio.shield(pending)
+        finally:
+            del self.in_flight[key]
+        self.cache.put(key, pdf)
+        return pdf, "miss"
+
+    async def handle_connection(self, reader, writer):
+        """Serve one HTTP/1.1 request and close the connection."""
+        try:
+            method, path, body = await self.read_request(reader)
+            if path == "/health":
+                if method != "GET":
+                    raise RequestError(405, "Use GET")
+                status = json.dumps({"status": "ok", "cache": self.cache.stats()})
+                await self.send(writer, 200, "application/json", status.encode())
+            elif path == "/render":
+                if method != "POST":
+                    raise RequestError(405, "Use POST")
+                pdf, cache_status = await self.render(parse_render_request(body))
+                await self.send(
+                    writer, 200, "application/pdf", pdf, {"X-Cache": cache_status}
+                )
+            else:
+                raise RequestError(404, f"No such endpoint: {path}")
+        except RequestError as e:
+            await self.send_error(writer, e.status, str(e))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"Warning: Render request failed ({type(e).__name__}: {e})")
+            await self.send_error(writer, 500, f"{type(e).__name__}: {e}")
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """Read the request line, headers and body of one request."""
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise RequestError(400, "Malformed request line")
+        method, path, _ = request_line
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(400, "Invalid Content-Length")
+        if length > self.max_request_bytes:
+            raise RequestError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], body
+
+    async def send(self, writer, status, content_type, body, headers=None):
+        """Write a response, streaming the body in chunks."""
+        head = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        view = memoryview(body)
+        for start in range(0, len(body), STREAM_CHUNK_SIZE):
+            writer.write(view[start : start + STREAM_CHUNK_SIZE])
+            await writer.drain()
+        await writer.drain()
+
+    async def send_error(self, writer, status, message):
+        """Write a JSON error response, ignoring a client that went away."""
+        try:
+            body = json.dumps({"error": message}).encode()
+            await self.send(writer, status, "application/json", body)
+        except ConnectionError:
+            pass
@@ -0,0 +1,102 @@
+from itertools import islice
+
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.card_renderer import LOGO_SIZE, CardRenderer
+from components.title_page_generator import (
+    DEFAULT_SUBTITLE,
+    DEFAULT_TITLE,
+    TitlePageGenerator,
+)
+from components.flashcard_generator import FlashcardGenerator
+from components.title_page_cache import TitlePageCache
+from components.imposition import Imposition
+
+# Render state for a pool worker, built once per process by init_worker
+_worker_state = None
+
+
+def init_worker(
+    logo_path,
+    logo_dpi,
+    style_overrides,
+    renderer_options,
+    invariant,
+    imposition,
+    title=DEFAULT_TITLE,
+    subtitle=DEFAULT_SUBTITLE,
+):
+    """Load fonts, the logo and styles once for this worker process."""
+    global _worker_state
+    resource_manager = ResourceManager(logo_path=logo_path, logo_dpi=logo_dpi)
+    resource_manager.get_logo(LOGO_SIZE, LOGO_SIZE)
+    _worker_state = (
+        resource_manager,
+        StyleManager.from_overrides(style_overrides),
+        renderer_options,
+        invariant,
+        imposition,
+        (title, subtitle),
+        TitlePageCache(),
+    )
+
+
+def render_cards(path, cards, include_title_page=False):
+    """Render cards, after a title page if asked, to a PDF of their own."""
+    (
+        resource_manager,
+        style_manager,
+        renderer_options,
+        invariant,
+        imposition,
+        (title, subtitle),
+        title_cache,
+    ) = _worker_state
+    generator = FlashcardGenerator(
+        output_file=path,
+        invariant=invariant,
+        imposition=imposition,
+        title_cache=title_cache,
+    )
+    card_renderer = CardRenderer(
+        generator.canvas, style_manager, resource_manager, **renderer_options
+    )
+    if include_title_page:
+        generator.draw_title_page(
+            TitlePageGenerator(
+                generator.canvas,
+                generator.page_width,
+                generator.page_height,
+                resource_manager,
+                card_renderer,
+                title=title,
+                subtitle=subtitle,
+            )
+        )
+    generator.draw_card_pages(cards, card_renderer, style_manager)
+    generator.canvas.save()
+    return path
+
+
+def get_imposition(imposition, style_manager):
+    """Return the imposition, or the default one, sized for a style's cards."""
+    card_size = (style_manager.card_width, style_manager.card_height)
+    return (imposition or Imposition()).for_card_size(card_size)
+
+
+def iter_deck(card_data, group_by_category=False):
+    """Iterate over a deck's cards in print order."""
+    if group_by_category:
+        return card_data.iter_by_category()
+    return card_data.iter_cards()
+
+
+def iter_page_groups(cards, cards_per_page, pages=1):
+    """Split cards into lists that fill a number of pages, the last maybe fewer."""
+    cards = iter(cards)
+    group_size = pages * cards_per_page
+    while True:
+        group = list(islice(cards, group_size))
+        if not group:
+            return
+        yield group
@@ -1,38 +1,131 @@
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.utils import ImageReader
 
+from components.font_cache import FontMetricsCache, find_font_file
+from components.image_pipeline import ImageVariantCache
+from components.tracing import NULL_TRACER
+
 class ResourceManager:
     """Handles resource loading and caching for the flashcard generator."""
     
-    def __init__(self, logo_path="insect_asylum_logo.png"):
+    # Fonts needed for the flashcards, mapped to their TTF files
+    FONT_FILES = {
+        # Base fonts
+        "DejaVuSans": "DejaVuSans.ttf",
+        "DejaVuSans-Bold": "DejaVuSans-Bold.ttf",
+        # Additional fonts - these would need to be available in your system
+        # or distributed with your application
+        "DejaVuSerif": "DejaVuSerif.ttf",
+        "DejaVuSerif-Bold": "DejaVuSerif-Bold.ttf",
+        "DejaVuSans-Oblique": "DejaVuSans-Oblique.ttf",
+        "DejaVuSans-BoldOblique": "DejaVuSans-BoldOblique.ttf",
+        "DejaVuSansMono": "DejaVuSansMono.ttf",
+        "DejaVuSansMono-Bold": "DejaVuSansMono-Bold.ttf",
+    }
+    
+    def __init__(
+        self,
+        logo_path="insect_asylum_logo.png",
+        font_cache_dir=None,
+        tracer=None,
+        logo_dpi=300,
+        image_cache_dir=None,
+    ):
         self.logo_path = logo_path
         self.logo_cache = None
-        self._register_fonts()
+        self.tracer = tracer or NULL_TRACER
+        
+        # The logo is drawn from a copy resampled to logo_dpi for each size it
+        # is placed at; None embeds the full-size source everywhere
+        self.logo_dpi = logo_dpi
+        self.image_cache = None
+        if logo_dpi:
+            self.image_cache = ImageVariantCache(image_cache_dir, logo_dpi)
+        self.logo_variants = {}
+        
+        # Fonts are registered the first time they are used, from metrics
+        # cached on disk when a previous run has already parsed them
+        self.font_cache = FontMetricsCache(font_cache_dir)
+        self.font_paths = {}
+        self.registered_fonts = []
+        
+        # Fonts and logo variants being loaded in the background by preload()
+        self.font_futures = {}
+        self.logo_futures = {}
     
-    def _register_fonts(self):
-        """Register fonts needed for the flashcards."""
-        # Base fonts
-        pdfmetrics.registerFont(TTFont("DejaVuSans", "DejaVuSans.ttf"))
-        pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", "DejaVuSans-Bold.ttf"))
+    def get_font_path(self, font_name):
+        """Return the resolved TTF file for one of our fonts."""
+        font_path = self.font_paths.get(font_name)
+        if font_path is None:
+            font_path = find_font_file(self.FONT_FILES[font_name])
+            self.font_paths[font_name] = font_path
+        return font_path
+    
+    def get_font(self, font_name):
+        """Make sure a font is registered, then return its name."""
+        if font_name in self.registered_fonts or font_name not in self.FONT_FILES:
+            # Already ours, or a font reportlab provides itself
+            return font_name
+        if font_name not in pdfmetrics.getRegisteredFontNames():
+            with self.tracer.span("font_registration"):
+                future = self.font_futures.pop(font_name, None)
+                font = future.result() if future else self._load_font(font_name)
+                pdfmetrics.registerFont(font)
+        self.registered_fonts.append(font_name)
+        return font_name
+    
+    def _load_font(self, font_name):
+        """Parse (or restore from the metrics cache) one of our fonts."""
+        return self.font_cache.load_font(font_name, self.get_font_path(font_name))
+    
+    def preload(self, executor, logo_sizes=()):
+        """Start loading every font and the logo at some sizes on an executor.
         
-        # Additional fonts - these would need to be available in your system
-        # or distributed with your application
-        pdfmetrics.registerFont(TTFont("DejaVuSerif", "DejaVuSerif.ttf"))
-        pdfmetrics.registerFont(TTFont("DejaVuSerif-Bold", "DejaVuSerif-Bold.ttf"))
-        pdfmetrics.registerFont(TTFont("DejaVuSans-Oblique", "DejaVuSans-Oblique.ttf"))
-        pdfmetrics.registerFont(TTFont("DejaVuSans-BoldOblique", "DejaVuSans-BoldOblique.ttf"))
-        pdfmetrics.registerFont(TTFont("DejaVuSansMono", "DejaVuSansMono.ttf"))
-        pdfmetrics.registerFont(TTFont("DejaVuSansMono-Bold", "DejaVuSansMono-Bold.ttf"))
-
-
+        Loading runs in the background while rendering starts. get_font and
+        get_logo wait only for the resource they are asked for, and only if
+        it is not ready yet.
+        """
+        for font_name in self.FONT_FILES:
+            if font_name not in pdfmetrics.getRegisteredFontNames():
+                self.font_futures[font_name] = executor.submit(self._load_font, font_name)
+        if self.get_logo() is not False and self.image_cache is not None:
+            for width, height in logo_sizes:
+                self.logo_futures[(width, height)] = executor.submit(
+                    self._load_logo_variant, width, height
+                )
+    
+    def register_all_fonts(self):
+        """Register every font up front instead of on first use."""
+        for font_name in self.FONT_FILES:
+            self.get_font(font_name)
     
-    def get_logo(self):
-        """Cache and return the logo image."""
+    def get_logo(self, width=None, height=None):
+        """Cache and return the logo image, resampled for a placement size if given."""
         if self.logo_cache is None:
             try:
                 self.logo_cache = ImageReader(self.logo_path)
             except Exception as e:
                 print(f"Warning: Could not load logo ({e})")
                 self.logo_cache = False  # Use False to indicate a failed load attempt
-        return self.logo_cache
+        if self.logo_cache is False or width is None or self.image_cache is None:
+            return self.logo_cache
+        
+        key = (width, height)
+        logo = self.logo_variants.get(key)
+        if logo is None:
+            with self.tracer.span("logo_resample"):
+                future = self.logo_futures.pop(key, None)
+                logo = future.result() if future else self._load_logo_variant(width, height)
+            self.logo_variants[key] = logo
+        return logo
+    
+    def _load_logo_variant(self, width, height):
+        """Resample and decode the logo for a placement size."""
+        try:
+            logo = ImageReader(self.image_cache.get_variant(self.logo_path, width, height))
+            # Decode now, so a preloaded variant is ready to embed
+            logo.getRGBData()
+        except Exception as e:
+            print(f"Warning: Could not resample logo ({e})")
+            logo = self.logo_cache
+        return logo
@@ -0,0 +1,275 @@
+import json
+import math
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.title_page_generator import DEFAULT_SUBTITLE, DEFAULT_TITLE
+from components.title_page_cache import TitlePageCache
+from components.fingerprint import file_digest
+from components.pdf_merge import merge_pdfs
+from components.render_workers import (
+    get_imposition,
+    init_worker,
+    iter_deck,
+    iter_page_groups,
+    render_cards,
+)
+
+
+def _merge_volume(path, input_files):
+    """Merge rendered chunks into one volume."""
+    merge_pdfs(input_files, path)
+    return path
+
+
+class ShardedRenderer:
+    """Splits a deck into PDF volumes, written concurrently, with a JSON manifest.
+
+    Volumes are cut on page boundaries, either every pages_per_volume pages
+    of cards or so that no volume is over max_volume_bytes. For a size
+    limit the deck is rendered in chunks of pages_per_chunk pages, and
+    consecutive chunks are merged into volumes while their combined size
+    fits. A chunk too big for a volume on its own is rendered again a page
+    at a time, and a ValueError is raised if a single page does not fit.
+    The manifest lists each volume's file, card range, page count, size and
+    SHA-256.
+    """
+
+    def __init__(
+        self,
+        output_file="nature_flashcards_premium.pdf",
+        pages_per_volume=None,
+        max_volume_bytes=None,
+        title_pages=False,
+        workers=None,
+        pages_per_chunk=5,
+        logo_path="insect_asylum_logo.png",
+        logo_dpi=300,
+        invariant=False,
+        group_by_category=False,
+        imposition=None,
+        title=DEFAULT_TITLE,
+        subtitle=DEFAULT_SUBTITLE,
+        style_overrides=None,
+        **renderer_options,
+    ):
+        if bool(pages_per_volume) == bool(max_volume_bytes):
+            raise ValueError("Give either pages_per_volume or max_volume_bytes")
+
+        # Volumes are written next to output_file and named after it
+        self.output_dir = os.path.dirname(os.path.abspath(output_file))
+        self.output_stem = os.path.splitext(os.path.basename(output_file))[0]
+        self.manifest_file = os.path.join(
+            self.output_dir, f"{self.output_stem}-volumes.json"
+        )
+
+        self.pages_per_volume = pages_per_volume
+        self.max_volume_bytes = max_volume_bytes
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_chunk = pages_per_chunk
+        self.logo_path = logo_path
+        self.logo_dpi = logo_dpi
+        self.invariant = invariant
+        self.group_by_category = group_by_category
+        self.title = title
+        self.subtitle = subtitle
+        self.style_overrides = style_overrides or {}
+
+        # Drafts have no title pages
+        self.title_pages = title_pages and renderer_options.get("fidelity") != "draft"
+
+        # Passed through to each worker's CardRenderer
+        self.renderer_options = renderer_options
+
+        self.imposition = get_imposition(
+            imposition, StyleManager.from_overrides(self.style_overrides)
+        )
+
+    def volume_path(self, number):
+        """Return the path of a volume, numbered from 1."""
+        return os.path.join(self.output_dir, f"{self.output_stem}-vol{number:03d}.pdf")
+
+    def count_pages(self, card_count):
+        """Return the pages in a volume of some cards, title page included."""
+        sides = 2 if self.imposition.duplex else 1
+        pages = math.ceil(card_count / self.imposition.cards_per_page) * sides
+        if self.title_pages:
+            pages += sides
+        return pages
+
+    def iter_groups(self, card_data, pages):
+        """Split the deck into lists of cards that fill a number of pages."""
+        return iter_page_groups(
+            iter_deck(card_data, self.group_by_category),
+            self.imposition.cards_per_page,
+            pages,
+        )
+
+    def generate_cards(self, card_data):
+        """Write the volumes and the manifest, and return the manifest."""
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(
+                self.logo_path,
+                self.logo_dpi,
+                self.style_overrides,
+                self.renderer_options,
+                self.invariant,
+                self.imposition,
+                self.title,
+                self.subtitle,
+            ),
+        ) as pool:
+            if self.pages_per_volume:
+                volumes = self.write_by_pages(pool, card_data)
+            else:
+                volumes = self.write_by_size(pool, card_data)
+
+        entries = []
+        first_card = 1
+        for path, card_count in volumes:
+            entry = {
+                "file": os.path.basename(path),
+                "first_card": first_card,
+                "last_card": first_card + card_count - 1,
+                "cards": card_count,
+                "pages": self.count_pages(card_count),
+                "bytes": os.path.getsize(path),
+                "sha256": file_digest(path),
+            }
+            entries.append(entry)
+            first_card += card_count
+
+        manifest = {
+            "cards": first_card - 1,
+            "pages_per_volume": self.pages_per_volume,
+            "max_volume_bytes": self.max_volume_bytes,
+            "volumes": entries,
+        }
+        temp_path = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_file)
+
+        print(f"📚 {len(entries)} volumes of flashcards saved to: {self.output_dir}")
+        print(f"   Manifest: {self.manifest_file}")
+        return manifest
+
+    def write_by_pages(self, pool, card_data):
+        """Render every pages_per_volume pages of cards as a volume.
+
+        Returns the volumes in order, as (path, card count).
+        """
+        volumes = []
+        pending = deque()
+        for number, cards in enumerate(
+            self.iter_groups(card_data, self.pages_per_volume), start=1
+        ):
+            path = self.volume_path(number)
+            volumes.append((path, len(cards)))
+            pending.append(pool.submit(render_cards, path, cards, self.title_pages))
+            # Keep a few volumes queued per worker, but not the whole deck
+            if len(pending) >= self.workers * 2:
+                pending.popleft().result()
+        while pending:
+            pending.popleft().result()
+        return volumes
+
+    def write_by_size(self, pool, card_data):
+        """Render chunks of pages and merge consecutive ones into volumes.
+
+        Returns the volumes in order, as (path, card count).
+        """
+        volumes = []
+        merges = []
+        with tempfile.TemporaryDirectory(dir=self.output_dir) as chunk_dir:
+            title_files, title_bytes = [], 0
+            if self.title_pages:
+                title_file, _ = TitlePageCache().get_page(
+                    ResourceManager(logo_path=self.logo_path, logo_dpi=self.logo_dpi),
+                    self.imposition,
+                    self.title,
+                    self.subtitle,
+                    self.renderer_options.get("pattern_seed", 0),
+                    self.renderer_options.get("gradient_mode", "shading"),
+                )
+                title_files, title_bytes = [title_file], os.path.getsize(title_file)
+
+            # The chunks of the volume being filled, as (path, card count)
+            chunks = []
+            volume_bytes = title_bytes
+            cards_added = 0
+
+            def finish_volume():
+                path = self.volume_path(len(volumes) + 1)
+                input_files = title_files + [chunk_file for chunk_file, _ in chunks]
+                if len(input_files) == 1:
+                    # Nothing to merge, and the size is known exactly
+                    os.replace(input_files[0], path)
+                else:
+                    merges.append(pool.submit(_merge_volume, path, input_files))
+                volumes.append((path, sum(count for _, count in chunks)))
+
+            def add_chunk(future, cards):
+                # Merging shares the logo and other identical objects, so the
+                # chunk sizes added up are an upper bound on the volume size
+                nonlocal volume_bytes, cards_added
+                chunk_file = future.result()
+                chunk_bytes = os.path.getsize(chunk_file)
+                if title_bytes + chunk_bytes > self.max_volume_bytes:
+                    cards_per_page = self.imposition.cards_per_page
+                    if len(cards) > cards_per_page:
+                        # Too big for any volume, so render it a page at a time
+                        stem = os.path.splitext(chunk_file)[0]
+                        pages = []
+                        page_groups = iter_page_groups(cards, cards_per_page)
+                        for i, page_cards in enumerate(page_groups):
+                            page_file = f"{stem}-{i:03d}.pdf"
+                            page = pool.submit(render_cards, page_file, page_cards)
+                            pages.append((page, page_cards))
+                        for page, page_cards in pages:
+                            add_chunk(page, page_cards)
+                        return
+                    raise ValueError(
+                        f"The page of cards {cards_added + 1}-"
+                        f"{cards_added + len(cards)} needs {title_bytes + chunk_bytes} "
+                        f"bytes, over the {self.max_volume_bytes}-byte volume limit"
+                    )
+                if chunks and volume_bytes + chunk_bytes > self.max_volume_bytes:
+                    finish_volume()
+                    chunks.clear()
+                    volume_bytes = title_bytes
+                chunks.append((chunk_file, len(cards)))
+                volume_bytes += chunk_bytes
+                cards_added += len(cards)
+
+            pending = deque()
+            groups = self.iter_groups(card_data, self.pages_per_chunk)
+            for i, cards in enumerate(groups):
+                chunk_file = os.path.join(chunk_dir, f"chunk{i:06d}.pdf")
+                pending.append((pool.submit(render_cards, chunk_file, cards), cards))
+                if len(pending) >= self.workers * 2:
+                    add_chunk(*pending.popleft())
+            while pending:
+                add_chunk(*pending.popleft())
+            if chunks:
+                finish_volume()
+
+            # The chunks are needed until every merge has finished
+            for merge in merges:
+                merge.result()
+
+        # Only a merge that grew its inputs could break the limit
+        for path, _ in volumes:
+            volume_bytes = os.path.getsize(path)
+            if volume_bytes > self.max_volume_bytes:
+                raise ValueError(
+                    f"{os.path.basename(path)} is {volume_bytes} bytes, over the "
+                    f"{self.max_volume_bytes}-byte volume limit"
+                )
+        return volumes
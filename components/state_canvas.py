@@ -0,0 +1,70 @@
+import functools
+
+
+class StateElidingMixin:
+    """Canvas mixin that skips graphics state changes which change nothing.
+
+    reportlab already tracks the current fill and stroke colors, line width
+    and font, and restores them with the graphics state. Setting a value
+    that is already current is dropped here instead of being written to the
+    content stream again, and a saveState/restoreState pair with nothing
+    drawn in between is removed.
+    """
+
+    def setFillColor(self, aColor, alpha=None):
+        if (
+            alpha is None
+            and aColor == self._fillColorObj
+            and getattr(aColor, "alpha", 1) == self._extgstate._d.get("ca", 1)
+        ):
+            return
+        super().setFillColor(aColor, alpha)
+
+    def setStrokeColor(self, aColor, alpha=None):
+        if (
+            alpha is None
+            and aColor == self._strokeColorObj
+            and getattr(aColor, "alpha", 1) == self._extgstate._d.get("CA", 1)
+        ):
+            return
+        super().setStrokeColor(aColor, alpha)
+
+    def setLineWidth(self, width):
+        if width == self._lineWidth:
+            return
+        super().setLineWidth(width)
+
+    def setFont(self, psfontname, size, leading=None):
+        if leading is None:
+            leading = size * 1.2
+        if (
+            psfontname == self._fontname
+            and size == self._fontsize
+            and leading == self._leading
+        ):
+            return
+        super().setFont(psfontname, size, leading)
+
+    def restoreState(self):
+        code = self._code
+        if code and code[-1] == "q":
+            # Nothing was drawn since the matching save
+            code.pop()
+            self.pop_state_stack()
+        else:
+            super().restoreState()
+
+    def beginForm(self, name, lowerx=0, lowery=0, upperx=None, uppery=None):
+        super().beginForm(name, lowerx, lowery, upperx, uppery)
+        # A form inherits the colors and line width of wherever it is drawn,
+        # so nothing is known about them yet. The font is set by the form's
+        # preamble.
+        self._fillColorObj = self._strokeColorObj = self._lineWidth = None
+
+
+@functools.lru_cache(maxsize=None)
+def with_state_elision(canvas_class):
+    """Return a subclass of a canvas class that elides redundant state changes."""
+    return type(
+        f"StateEliding{canvas_class.__name__}", (StateElidingMixin, canvas_class), {}
+    )
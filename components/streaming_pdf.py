@@ -0,0 +1,127 @@
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+
+
+class StreamingPDFDocument(pdfdoc.PDFDocument):
+    """PDF document that writes each page to its file as soon as it is added.
+
+    reportlab normally keeps every page in memory until the document is
+    saved. Here a finished page and its content stream are formatted and
+    written straight away, and only the objects shared between pages
+    (fonts, images, forms, shadings and the page tree) are kept until save.
+    """
+
+    def __init__(self, output, **kwargs):
+        super().__init__(**kwargs)
+        self.output = output
+        self.position = 0
+
+        # Every page refers to the page tree, so number it up front rather
+        # than while the first page is written
+        self.Reference(self.Pages)
+        self.write(pdfdoc.PDFFile(self._pdfVersion).format(self))
+
+    def write(self, data):
+        """Append bytes to the output and return the offset they start at."""
+        offset = self.position
+        self.output.write(data)
+        self.position += len(data)
+        return offset
+
+    def write_object(self, name, data=None):
+        """Write a registered object and release it from memory."""
+        if data is None:
+            data = pdfdoc.PDFIndirectObject(name, self.idToObject[name]).format(self)
+        self.idToOffset[name] = self.write(data)
+        self.idToObject[name] = None
+
+    def addPage(self, page):
+        first_number = self.objectcounter + 1
+        super().addPage(page)
+        name = self.numberToId[first_number]
+        try:
+            data = pdfdoc.PDFIndirectObject(name, page).format(self)
+        except KeyError:
+            # The page refers to an object that is not defined yet, so it
+            # has to wait for the end like the shared objects
+            return
+
+        # Formatting the page registers its own objects, such as its
+        # content stream, which no other page uses
+        self.write_object(name, data)
+        number = first_number + 1
+        while number <= self.objectcounter:
+            self.write_object(self.numberToId[number])
+            number += 1
+        self.Pages.pages[-1] = pdfdoc.PDFObjectReference(name)
+
+    def SaveToFile(self, filename, canvas):
+        """Write the remaining objects, the cross-reference table and trailer."""
+        if getattr(self, "_savedToFile", False):
+            raise RuntimeError("A streaming document can only be saved once")
+        self._savedToFile = True
+
+        for font in self.delayedFonts:
+            font.addObjects(self)
+        self.info.invariant = self.invariant
+        self.info.digest(self.signature)
+        catalog = self.Reference(self.Catalog)
+        info = self.Reference(self.info)
+        self.Outlines.prepare(self, canvas)
+        if self.Outlines.ready < 0:
+            self.Catalog.Outlines = None
+
+        # Objects can still be registered while others are formatted
+        number = 1
+        while number in self.numberToId:
+            name = self.numberToId[number]
+            if name not in self.idToOffset:
+                self.write_object(name)
+            number += 1
+
+        xref = pdfdoc.PDFCrossReferenceTable()
+        xref.addsection(0, [self.numberToId[n] for n in range(1, number)])
+        xref_offset = self.write(xref.format(self))
+        trailer = pdfdoc.PDFTrailer(
+            startxref=xref_offset,
+            Size=number,
+            Root=catalog,
+            Info=info,
+            ID=self.ID(),
+        )
+        self.write(trailer.format(self))
+
+
+class StreamingCanvas(canvas.Canvas):
+    """Canvas whose pages go to the output file as each one is finished.
+
+    Memory use stays flat however many pages are drawn. The file is open
+    for the canvas's whole life and is complete once save() returns.
+    """
+
+    def __init__(self, filename, pagesize=None, invariant=None, **kwargs):
+        super().__init__(filename, pagesize=pagesize, invariant=invariant, **kwargs)
+        if hasattr(filename, "write"):
+            self._output, self._owns_output = filename, False
+        else:
+            self._output, self._owns_output = open(filename, "wb"), True
+
+        # The header is written first, so start at the version our
+        # transparency effects need instead of upgrading it later
+        self._doc = StreamingPDFDocument(
+            self._output,
+            compression=self._pageCompression,
+            invariant=self._doc.invariant,
+            filename=filename,
+            pdfVersion=max(
+                self._doc._pdfVersion, pdfdoc.PDF_SUPPORT_VERSION["transparency"]
+            ),
+        )
+
+    def save(self):
+        """Finish the document and close the output file if the canvas opened it."""
+        try:
+            super().save()
+        finally:
+            if self._owns_output:
+                self._output.close()
@@ -1,7 +1,67 @@
+import json
+
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
 
+# Largest card dimension and font size a style override may ask for. Cards
+# that do not fit the sheet are caught later, by the imposition.
+MAX_CARD_INCHES = 48
+MAX_FONT_SIZE = 144
+
+
+def check_number(name, value, low, high, allow_low=False):
+    """Raise ValueError unless value is a number above low (or equal to it
+    with allow_low) and no more than high."""
+    if (
+        isinstance(value, bool)
+        or not isinstance(value, (int, float))
+        or not low <= value <= high
+        or (value == low and not allow_low)
+    ):
+        bounds = f"from {low}" if allow_low else f"above {low}"
+        raise ValueError(
+            f"{name} must be a number {bounds} up to {high}, not {value!r}"
+        )
+
+
+class CompiledStyle:
+    """A category's colors, typography and derived layout, resolved once.
+
+    Attributes mirror the keys of the color scheme and typography dicts.
+    header_text_x and header_text_y place the category label relative to
+    the card's bottom-left corner. Instances are immutable.
+    """
+
+    __slots__ = (
+        "category",
+        "header",
+        "gradient_start",
+        "gradient_end",
+        "text_color",
+        "border_color",
+        "shadow_color",
+        "pattern_color",
+        "header_font",
+        "header_size",
+        "question_font",
+        "question_size",
+        "header_text_width",
+        "header_text_x",
+        "header_text_y",
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
 class StyleManager:
     """Manages styles and colors for the flashcards."""
 
@@ -12,6 +72,24 @@ class StyleManager:
         self.category_colors = self._init_category_colors()
         self.typography = self._init_typography()
 
+    @classmethod
+    def from_file(cls, path):
+        """Create a style manager with the overrides in a JSON file applied."""
+        return cls.from_overrides(cls.read_overrides(path))
+
+    @classmethod
+    def from_overrides(cls, overrides):
+        """Create a style manager with some overrides applied."""
+        style_manager = cls()
+        style_manager.apply_overrides(overrides or {})
+        return style_manager
+
+    @staticmethod
+    def read_overrides(path):
+        """Read style overrides from a JSON file."""
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
     def _init_typography(self):
         """Initialize typography settings for all categories."""
         return {
@@ -232,3 +310,94 @@ class StyleManager:
     def get_color_scheme(self, category):
         """Get the color scheme for a category."""
         return self.category_colors.get(category, self.get_default_color_scheme())
+
+    def compile_style(self, category, text_layout):
+        """Resolve a category's style into a CompiledStyle, measuring its label."""
+        color_scheme = self.get_color_scheme(category)
+        typography = self.get_typography(category)
+        header_text_width = text_layout.string_width(
+            category, typography["header_font"], typography["header_size"]
+        )
+        return CompiledStyle(
+            category=category,
+            header=color_scheme["header"],
+            gradient_start=color_scheme["gradient_start"],
+            gradient_end=color_scheme["gradient_end"],
+            text_color=color_scheme["text_color"],
+            border_color=color_scheme["border_color"],
+            shadow_color=color_scheme["shadow_color"],
+            pattern_color=color_scheme["pattern_color"],
+            header_font=typography["header_font"],
+            header_size=typography["header_size"],
+            question_font=typography["question_font"],
+            question_size=typography["question_size"],
+            header_text_width=header_text_width,
+            # Centered, with better vertical centering
+            header_text_x=(self.card_width - header_text_width) / 2,
+            header_text_y=self.card_height - (self.header_height / 2) - 5,
+        )
+
+    def apply_overrides(self, overrides):
+        """Apply style overrides such as those given for a deck in a batch manifest.
+
+        overrides may contain "card_width", "card_height" and "header_height"
+        in inches, and "colors" / "typography" dicts mapping a category to the
+        keys to change. Colors are [r, g, b], [r, g, b, a] with components
+        from 0 to 1, hex strings or reportlab color names. Font sizes are in
+        points. A ValueError names the first override that is not valid.
+        """
+        if not isinstance(overrides, dict):
+            raise ValueError("Style overrides must be an object")
+        for name in ("card_width", "card_height", "header_height"):
+            if name in overrides:
+                value = overrides[name]
+                check_number(name, value, 0, MAX_CARD_INCHES)
+                setattr(self, name, value * inch)
+        if self.header_height > self.card_height:
+            raise ValueError("header_height must not be more than card_height")
+
+        for category, scheme in self._get_override_table(overrides, "colors"):
+            color_scheme = dict(self.get_color_scheme(category))
+            for key, value in scheme.items():
+                if key not in color_scheme:
+                    raise ValueError(f"Unknown color for {category!r}: {key!r}")
+                color_scheme[key] = self.parse_color(value)
+            self.category_colors[category] = color_scheme
+
+        for category, settings in self._get_override_table(overrides, "typography"):
+            typography = dict(self.get_typography(category))
+            for key, value in settings.items():
+                if key.endswith("_font"):
+                    if key not in typography or not isinstance(value, str):
+                        raise ValueError(
+                            f"Invalid font for {category!r}: {key!r} = {value!r}"
+                        )
+                elif key.endswith("_size") and key in typography:
+                    check_number(f"{category!r} {key}", value, 0, MAX_FONT_SIZE)
+                else:
+                    raise ValueError(f"Unknown typography for {category!r}: {key!r}")
+            typography.update(settings)
+            self.typography[category] = typography
+
+    @staticmethod
+    def _get_override_table(overrides, name):
+        """Return the (category, settings) pairs of a colors or typography table."""
+        table = overrides.get(name, {})
+        if not isinstance(table, dict) or not all(
+            isinstance(settings, dict) for settings in table.values()
+        ):
+            raise ValueError(f"{name} must map each category to an object")
+        return table.items()
+
+    def parse_color(self, value):
+        """Convert a color given as a list, hex string or name to a Color."""
+        if isinstance(value, (list, tuple)):
+            if len(value) not in (3, 4):
+                raise ValueError(f"Colors need 3 or 4 components, not {value!r}")
+            for component in value:
+                check_number("A color component", component, 0, 1, allow_low=True)
+            return colors.Color(*value)
+        color = colors.toColor(value, None) if isinstance(value, str) else None
+        if color is None:
+            raise ValueError(f"Unknown color: {value!r}")
+        return color
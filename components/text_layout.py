@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from reportlab.pdfbase import pdfmetrics
+
+
+class TextLayout:
+    """Measures and wraps text using cached per-font glyph advance tables."""
+
+    def __init__(self, resource_manager, cache_size=10000):
+        self.resource_manager = resource_manager
+        self.cache_size = cache_size
+        self.width_tables = {}
+        self.word_widths = {}
+        self.layout_cache = OrderedDict()
+
+    def get_width_table(self, font_name):
+        """Return (advance widths, default width) for a font in 1/1000 em units."""
+        table = self.width_tables.get(font_name)
+        if table is None:
+            font = pdfmetrics.getFont(self.resource_manager.get_font(font_name))
+            face = getattr(font, "face", None)
+            if font_name in self.resource_manager.registered_fonts and hasattr(
+                face, "charWidths"
+            ):
+                # TrueType fonts expose their advances keyed by code point
+                table = (face.charWidths, face.defaultWidth)
+            else:
+                # Fall back to measuring glyphs one at a time as they are seen
+                table = (_MeasuredWidths(font_name), 0)
+            self.width_tables[font_name] = table
+        return table
+
+    def text_units(self, text, font_name):
+        """Return the advance of some text in 1/1000 em units."""
+        key = (text, font_name)
+        units = self.word_widths.get(key)
+        if units is None:
+            widths, default_width = self.get_width_table(font_name)
+            get = widths.get
+            units = sum(get(ord(char), default_width) for char in text)
+            self.word_widths[key] = units
+        return units
+
+    def string_width(self, text, font_name, font_size):
+        """Return the width of some text in points."""
+        return 0.001 * font_size * self.text_units(text, font_name)
+
+    def wrap(self, text, font_name, font_size, max_width):
+        """Break text into lines no wider than max_width.
+
+        Returns a tuple of (line, width) pairs. Results are memoized, so
+        repeated questions skip layout entirely.
+        """
+        key = (text, font_name, font_size, max_width)
+        lines = self.layout_cache.get(key)
+        if lines is not None:
+            self.layout_cache.move_to_end(key)
+            return lines
+
+        scale = 0.001 * font_size
+        space_units = self.text_units(" ", font_name)
+
+        # Same greedy rule as before: a word joins the line if the line,
+        # including its trailing space, still fits
+        line_words = []
+        line_units = 0
+        wrapped = []
+        for word in text.split():
+            word_units = self.text_units(word, font_name)
+            if scale * (line_units + word_units + space_units) <= max_width:
+                line_words.append(word)
+                line_units += word_units + space_units
+            else:
+                wrapped.append(self._finish_line(line_words, line_units, space_units, scale))
+                line_words = [word]
+                line_units = word_units + space_units
+        if line_words:
+            wrapped.append(self._finish_line(line_words, line_units, space_units, scale))
+
+        lines = tuple(wrapped)
+        self.layout_cache[key] = lines
+        if len(self.layout_cache) > self.cache_size:
+            self.layout_cache.popitem(last=False)
+        return lines
+
+    def _finish_line(self, words, units, space_units, scale):
+        """Return a (line, width) pair without the trailing space."""
+        if not words:
+            return ("", 0.0)
+        return (" ".join(words), scale * (units - space_units))
+
+
+class _MeasuredWidths(dict):
+    """Width table that measures unknown glyphs through reportlab on demand."""
+
+    def __init__(self, font_name):
+        super().__init__()
+        self.font_name = font_name
+
+    def get(self, code, default=None):
+        width = dict.get(self, code)
+        if width is None:
+            width = pdfmetrics.stringWidth(chr(code), self.font_name, 1000)
+            self[code] = width
+        return width
@@ -0,0 +1,189 @@
+import io
+import marshal
+import os
+
+from reportlab import Version as reportlab_version
+
+from components.style_manager import StyleManager
+from components.card_renderer import CardRenderer
+from components.title_page_generator import (
+    DEFAULT_SUBTITLE,
+    DEFAULT_TITLE,
+    TitlePageGenerator,
+)
+from components.flashcard_generator import FlashcardGenerator
+from components.fingerprint import file_digest, hash_description
+from components.font_cache import default_cache_dir
+from components.imposition import Imposition
+from components.page_capture import capture_pages
+
+# Source files whose drawing code affects how the title page looks, and
+# the fonts it uses
+TITLE_PAGE_MODULES = (
+    "card_renderer.py",
+    "pattern_generator.py",
+    "title_page_generator.py",
+    "flashcard_generator.py",
+    "state_canvas.py",
+    "image_pipeline.py",
+    "page_capture.py",
+)
+TITLE_PAGE_FONTS = ("DejaVuSans", "DejaVuSans-Bold")
+
+
+class TitlePageCache:
+    """Title pages drawn once and shared by every build with the same branding.
+
+    A title page depends only on the logo, the title and subtitle, the sheet
+    and a few renderer settings, never on the cards. Each is captured (see
+    page_capture) under a hash of all of those, plus the drawing code and
+    fonts, so changing any of them draws a new page while other decks keep
+    reusing theirs. FlashcardGenerator draws a captured title page as a form
+    XObject, and get_page writes one out as a PDF for the modes that merge
+    PDFs. Captures are also kept in memory for processes that build many
+    decks.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir("title-pages")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.captures = {}
+
+    def get_key(
+        self, resource_manager, imposition, title, subtitle, pattern_seed, gradient_mode
+    ):
+        """Hash everything that determines how a title page is drawn."""
+        components_dir = os.path.dirname(os.path.abspath(__file__))
+        logo_path = resource_manager.logo_path
+        return hash_description(
+            {
+                "code": [
+                    file_digest(os.path.join(components_dir, name))
+                    for name in TITLE_PAGE_MODULES
+                ],
+                "reportlab": reportlab_version,
+                "fonts": [
+                    file_digest(resource_manager.get_font_path(name))
+                    for name in TITLE_PAGE_FONTS
+                ],
+                "logo": file_digest(logo_path) if os.path.exists(logo_path) else None,
+                "logo_dpi": resource_manager.logo_dpi,
+                "title": title,
+                "subtitle": subtitle,
+                "sheet": list(imposition.page_size),
+                "duplex": imposition.duplex,
+                "pattern_seed": pattern_seed,
+                "gradient_mode": gradient_mode,
+            }
+        )
+
+    def capture_path(self, key):
+        """Return where the captured title page for a key is (or would be) stored."""
+        return os.path.join(self.cache_dir, f"{key}-m{marshal.version}.marshal")
+
+    def page_path(self, key):
+        """Return where the title page PDF for a key is (or would be) stored."""
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def get_capture(
+        self,
+        resource_manager,
+        imposition=None,
+        title=DEFAULT_TITLE,
+        subtitle=DEFAULT_SUBTITLE,
+        pattern_seed=0,
+        gradient_mode="shading",
+    ):
+        """Return the captured title page and whether it was just drawn."""
+        imposition = imposition or Imposition()
+        key = self.get_key(
+            resource_manager, imposition, title, subtitle, pattern_seed, gradient_mode
+        )
+        capture = self.captures.get(key)
+        if capture is not None:
+            return capture, False
+
+        path = self.capture_path(key)
+        rendered = False
+        try:
+            # marshal.load reads a file in small pieces; one read is much faster
+            with open(path, "rb") as f:
+                capture = marshal.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable title page cache {path} ({e})")
+        if capture is None:
+            capture = self._capture_title_page(
+                resource_manager,
+                imposition,
+                title,
+                subtitle,
+                pattern_seed,
+                gradient_mode,
+            )
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(marshal.dumps(capture))
+            os.replace(temp_path, path)
+            rendered = True
+        self.captures[key] = capture
+        return capture, rendered
+
+    def _capture_title_page(
+        self, resource_manager, imposition, title, subtitle, pattern_seed, gradient_mode
+    ):
+        """Draw the title page on a scratch canvas and capture it."""
+        generator = FlashcardGenerator(
+            output_file=io.BytesIO(), invariant=True, imposition=imposition
+        )
+        card_renderer = CardRenderer(
+            generator.canvas,
+            StyleManager(),
+            resource_manager,
+            pattern_seed=pattern_seed,
+            gradient_mode=gradient_mode,
+        )
+        TitlePageGenerator(
+            generator.canvas,
+            generator.page_width,
+            generator.page_height,
+            resource_manager,
+            card_renderer,
+            title=title,
+            subtitle=subtitle,
+        ).create_title_page()
+        generator.canvas.showPage()
+        return capture_pages(generator.canvas)
+
+    def get_page(
+        self,
+        resource_manager,
+        imposition=None,
+        title=DEFAULT_TITLE,
+        subtitle=DEFAULT_SUBTITLE,
+        pattern_seed=0,
+        gradient_mode="shading",
+    ):
+        """Return the path of the title page PDF and whether it was just drawn."""
+        imposition = imposition or Imposition()
+        key = self.get_key(
+            resource_manager, imposition, title, subtitle, pattern_seed, gradient_mode
+        )
+        path = self.page_path(key)
+        if os.path.exists(path):
+            return path, False
+
+        capture, rendered = self.get_capture(
+            resource_manager, imposition, title, subtitle, pattern_seed, gradient_mode
+        )
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        generator = FlashcardGenerator(
+            output_file=temp_path, invariant=True, imposition=imposition
+        )
+        # A fresh document has no font codes for the capture to clash with
+        generator.draw_captured_title_page(capture, resource_manager)
+        generator.end_title_page()
+        generator.canvas.save()
+        os.replace(temp_path, path)
+        return path, rendered
@@ -1,16 +1,30 @@
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 
+from components.tracing import NULL_TRACER, traced
+
+# Branding text drawn under the logo
+DEFAULT_TITLE = "Nature Exploration Flashcards"
+DEFAULT_SUBTITLE = "The Insect Asylum Collection"
+
+# Width and height of the logo on the title page
+TITLE_LOGO_SIZE = 4 * inch
+
 class TitlePageGenerator:
     """Generates a title page for the flashcards PDF."""
     
-    def __init__(self, canvas, page_width, page_height, resource_manager, card_renderer):
+    def __init__(self, canvas, page_width, page_height, resource_manager, card_renderer, tracer=None,
+                 title=DEFAULT_TITLE, subtitle=DEFAULT_SUBTITLE):
         self.canvas = canvas
+        self.tracer = tracer or NULL_TRACER
         self.page_width = page_width
         self.page_height = page_height
         self.resource_manager = resource_manager
         self.card_renderer = card_renderer
+        self.title = title
+        self.subtitle = subtitle
     
+    @traced("title_page")
     def create_title_page(self):
         """Create a beautiful title page with the logo."""
         # Draw a gradient background for the entire page
@@ -26,14 +40,15 @@ class TitlePageGenerator:
         self.card_renderer.draw_subtle_pattern(
             50, 50, 
             self.page_width-100, self.page_height-100, 
-            colors.Color(0.5, 0.5, 0.8, 0.05)
+            colors.Color(0.5, 0.5, 0.8, 0.05),
+            seed=self.card_renderer.get_pattern_seed("title page")
         )
         
         # Place the logo in the center upper portion of the page
-        cached_logo = self.resource_manager.get_logo()
+        cached_logo = self.resource_manager.get_logo(TITLE_LOGO_SIZE, TITLE_LOGO_SIZE)
         if cached_logo is not False:
-            logo_width = 4 * inch
-            logo_height = 4 * inch
+            logo_width = TITLE_LOGO_SIZE
+            logo_height = TITLE_LOGO_SIZE
             
             # Center the logo horizontally
             logo_x = (self.page_width - logo_width) / 2
@@ -43,7 +58,7 @@ class TitlePageGenerator:
                 self.canvas.drawImage(cached_logo, logo_x, logo_y, width=logo_width, height=logo_height, mask='auto')
             except Exception:
                 # Fallback if there's an issue drawing the image
-                self.canvas.setFont("DejaVuSans-Bold", 30)
+                self.canvas.setFont(self.resource_manager.get_font("DejaVuSans-Bold"), 30)
                 self.canvas.setFillColor(colors.Color(0.3, 0.3, 0.5))
                 text = "THE INSECT ASYLUM"
                 text_width = self.canvas.stringWidth(text, "DejaVuSans-Bold", 30)
@@ -55,15 +70,15 @@ class TitlePageGenerator:
             self.canvas.line(logo_x, logo_y - 20, logo_x + logo_width, logo_y - 20)
             
             # Add title text
-            self.canvas.setFont("DejaVuSans-Bold", 24)
+            self.canvas.setFont(self.resource_manager.get_font("DejaVuSans-Bold"), 24)
             self.canvas.setFillColor(colors.Color(0.3, 0.3, 0.5))
-            title = "Nature Exploration Flashcards"
+            title = self.title
             title_width = self.canvas.stringWidth(title, "DejaVuSans-Bold", 24)
             self.canvas.drawString((self.page_width - title_width) / 2, logo_y - 60, title)
             
             # Add subtitle
-            self.canvas.setFont("DejaVuSans", 16)
+            self.canvas.setFont(self.resource_manager.get_font("DejaVuSans"), 16)
             self.canvas.setFillColor(colors.Color(0.4, 0.4, 0.6))
-            subtitle = "The Insect Asylum Collection"
+            subtitle = self.subtitle
             subtitle_width = self.canvas.stringWidth(subtitle, "DejaVuSans", 16)
             self.canvas.drawString((self.page_width - subtitle_width) / 2, logo_y - 90, subtitle)
@@ -0,0 +1,133 @@
+import functools
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    """Context manager that does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer used when instrumentation is off; records nothing."""
+
+    enabled = False
+
+    def span(self, name):
+        return _NULL_SPAN
+
+    def summary(self):
+        return {}
+
+    def save(self, path):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+class _Span:
+    """Times one stage and reports it to its tracer on exit."""
+
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Tracer:
+    """Records per-stage durations and call counts as Chrome trace events.
+
+    The saved file loads in chrome://tracing, Perfetto and speedscope.
+    Stages past max_events still count towards the summary but are not
+    kept as individual events.
+    """
+
+    enabled = True
+
+    def __init__(self, max_events=1000000):
+        self.max_events = max_events
+        self.events = []
+        self.stats = {}
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+
+    def span(self, name):
+        """Return a context manager that times a stage."""
+        return _Span(self, name)
+
+    def record(self, name, start, end):
+        """Record one completed stage, with times in nanoseconds."""
+        if len(self.events) < self.max_events:
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": "render",
+                    "ph": "X",
+                    "ts": (start - self.origin) / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": self.pid,
+                    "tid": threading.get_ident(),
+                }
+            )
+        stat = self.stats.get(name)
+        if stat is None:
+            self.stats[name] = [1, end - start]
+        else:
+            stat[0] += 1
+            stat[1] += end - start
+
+    def summary(self):
+        """Return {stage: {"calls": n, "seconds": total}}, slowest first."""
+        ordered = sorted(self.stats.items(), key=lambda item: -item[1][1])
+        return {
+            name: {"calls": calls, "seconds": total / 1e9}
+            for name, (calls, total) in ordered
+        }
+
+    def save(self, path):
+        """Write the trace in Chrome trace event JSON format."""
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": self.events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"summary": self.summary()},
+                },
+                f,
+            )
+
+
+def traced(stage):
+    """Decorate a method so its calls are recorded as a stage on self.tracer."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(stage):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,35 +1,398 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from reportlab.lib.units import inch
+
 from components.resource_manager import ResourceManager
 from components.card_data import CardData
 from components.style_manager import StyleManager
-from components.card_renderer import CardRenderer
-from components.title_page_generator import TitlePageGenerator
+from components.card_renderer import FIDELITY_LEVELS, LOGO_SIZE, CardRenderer
+from components.title_page_generator import (
+    DEFAULT_SUBTITLE,
+    DEFAULT_TITLE,
+    TITLE_LOGO_SIZE,
+    TitlePageGenerator,
+)
 from components.flashcard_generator import FlashcardGenerator
+from components.parallel_renderer import ParallelRenderer
+from components.sharded_output import ShardedRenderer
+from components.build_cache import IncrementalBuilder
+from components.title_page_cache import TitlePageCache
+from components.batch_runner import BatchRunner
+from components.render_service import RenderService
+from components.raster_renderer import PreviewExporter
+from components.deck_watcher import DeckWatcher
+from components.imposition import Imposition, parse_sheet_size
+from components.tracing import NULL_TRACER, Tracer
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate nature flashcards as a PDF.")
+    parser.add_argument(
+        "--output", default="nature_flashcards_premium.pdf", help="PDF file to write"
+    )
+    parser.add_argument(
+        "--deck", help="CSV, JSONL or compiled .deck file of cards to use"
+    )
+    parser.add_argument(
+        "--group-by-category",
+        action="store_true",
+        help="print all cards of a category together",
+    )
+    parser.add_argument(
+        "--templates",
+        action="store_true",
+        help="draw each category's card chrome once and reuse it for every card",
+    )
+    parser.add_argument(
+        "--stepped-gradients",
+        action="store_true",
+        help="draw gradients as stacked bands instead of native PDF shadings",
+    )
+    parser.add_argument(
+        "--fidelity",
+        choices=FIDELITY_LEVELS,
+        default="final",
+        help="draft skips the title page, decorations and logo for fast previews",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed for the card dot patterns"
+    )
+    parser.add_argument(
+        "--invariant",
+        action="store_true",
+        help="omit timestamps so identical input gives a byte-identical PDF",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="write pages to the PDF as they are finished to keep memory use flat",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="render page chunks on this many processes and merge the results",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse cached pages and re-render only the ones whose inputs changed",
+    )
+    parser.add_argument(
+        "--cache-dir", default=".flashcard_cache", help="where rendered pages are cached"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="build every deck listed in a JSON manifest, using --workers processes",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="run a localhost HTTP rendering service, using --workers processes",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="port for --serve (default 8765)"
+    )
+    parser.add_argument(
+        "--png-dir",
+        metavar="DIR",
+        help="write a PNG preview of every card to DIR instead of a PDF",
+    )
+    parser.add_argument(
+        "--png-dpi",
+        default="150",
+        help="comma-separated preview resolutions (default 150)",
+    )
+    parser.add_argument(
+        "--styles",
+        metavar="FILE",
+        help="JSON file of style overrides, as given for a deck in a batch manifest",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="stay running and re-render whenever the --deck or --styles file changes",
+    )
+    parser.add_argument(
+        "--compile-deck",
+        metavar="FILE",
+        help="write the deck to a compiled .deck file for fast random access and exit",
+    )
+    parser.add_argument(
+        "--logo-dpi",
+        type=int,
+        default=300,
+        help="resolution the logo is resampled to for each size it is drawn at "
+        "(default 300; 0 embeds the full-size image)",
+    )
+    parser.add_argument(
+        "--title", default=DEFAULT_TITLE, help="title shown on the title page"
+    )
+    parser.add_argument(
+        "--subtitle", default=DEFAULT_SUBTITLE, help="subtitle shown on the title page"
+    )
+    parser.add_argument(
+        "--sheet",
+        type=parse_sheet_size,
+        default="letter",
+        help="sheet size: letter, a4, 12x18, 13x19 or WxH in inches (default letter)",
+    )
+    parser.add_argument(
+        "--gutter", type=float, default=0, help="space between cards, in inches"
+    )
+    parser.add_argument(
+        "--bleed", type=float, default=0, help="bleed around each card, in inches"
+    )
+    parser.add_argument(
+        "--margin", type=float, default=0, help="unprintable sheet margin, in inches"
+    )
+    parser.add_argument(
+        "--duplex",
+        action="store_true",
+        help="follow each sheet of cards with a sheet of card backs",
+    )
+    parser.add_argument(
+        "--rotate-cards",
+        action="store_true",
+        help="turn cards sideways when that fits more on a sheet",
+    )
+    parser.add_argument(
+        "--volume-pages",
+        type=int,
+        metavar="N",
+        help="split the output into PDF volumes of N pages of cards, written "
+        "concurrently on --workers processes, with a JSON manifest",
+    )
+    parser.add_argument(
+        "--volume-mb",
+        type=float,
+        metavar="M",
+        help="split the output into PDF volumes of at most M megabytes each",
+    )
+    parser.add_argument(
+        "--volume-title-pages",
+        action="store_true",
+        help="start every volume with its own title page",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="record per-stage timings of a single-process PDF build and write "
+        "them as a Chrome trace JSON file",
+    )
+    args = parser.parse_args()
+    if args.watch and not (args.deck or args.styles):
+        parser.error("--watch needs a --deck or --styles file to watch")
+    if args.styles and (args.batch or args.serve):
+        parser.error(
+            "--styles cannot be used with --batch or --serve, which take styles "
+            "per deck or per request"
+        )
+    if args.volume_pages and args.volume_mb:
+        parser.error("--volume-pages and --volume-mb cannot be used together")
+    if args.trace:
+        # Only the single-process PDF build is instrumented
+        untraced = {
+            "--workers": args.workers,
+            "--incremental": args.incremental,
+            "--volume-pages": args.volume_pages,
+            "--volume-mb": args.volume_mb,
+            "--watch": args.watch,
+            "--png-dir": args.png_dir,
+            "--batch": args.batch,
+            "--serve": args.serve,
+            "--compile-deck": args.compile_deck,
+        }
+        options = [option for option, value in untraced.items() if value]
+        if options:
+            parser.error(f"--trace cannot be used with {', '.join(options)}")
+    return args
 
 def main():
     """Main entry point for the flashcard generator application."""
+    args = parse_args()
+    
+    # Options every renderer takes, PDF or PNG
+    renderer_options = dict(
+        use_templates=args.templates,
+        pattern_seed=args.seed,
+        gradient_mode="stepped" if args.stepped_gradients else "shading",
+        fidelity=args.fidelity,
+    )
+
+    style_overrides = StyleManager.read_overrides(args.styles) if args.styles else {}
+
+    if args.serve:
+        RenderService(port=args.port, workers=args.workers).serve_forever()
+        return
+
+    if args.batch:
+        failed = BatchRunner(args.batch, workers=args.workers).run()
+        if failed:
+            sys.exit(1)
+        return
+
     # Initialize the necessary components
-    output_file = "nature_flashcards_premium.pdf"
-    resource_manager = ResourceManager(logo_path="insect_asylum_logo.png")
-    card_data = CardData()
-    style_manager = StyleManager()
+    output_file = args.output
+    card_data = CardData.from_file(args.deck) if args.deck else CardData()
+    
+    if args.compile_deck:
+        card_count = card_data.compile(args.compile_deck)
+        print(f"📦 Compiled {card_count} cards to: {os.path.abspath(args.compile_deck)}")
+        return
     
-    # Create the flashcard generator
-    generator = FlashcardGenerator(output_file=output_file)
+    imposition = Imposition(
+        page_size=args.sheet,
+        gutter=args.gutter * inch,
+        bleed=args.bleed * inch,
+        margin=args.margin * inch,
+        duplex=args.duplex,
+        allow_rotation=args.rotate_cards,
+    )
+    
+    if args.png_dir:
+        PreviewExporter(
+            args.png_dir,
+            dpis=[int(dpi) for dpi in args.png_dpi.split(",")],
+            workers=args.workers,
+            style_overrides=style_overrides,
+            **renderer_options,
+        ).export(card_data)
+        return
+    
+    if args.watch:
+        DeckWatcher(
+            output_file=output_file,
+            deck_path=args.deck,
+            styles_path=args.styles,
+            logo_dpi=args.logo_dpi or None,
+            invariant=args.invariant,
+            group_by_category=args.group_by_category,
+            imposition=imposition,
+            title=args.title,
+            subtitle=args.subtitle,
+            **renderer_options,
+        ).run()
+        return
     
-    # Create the card renderer
-    card_renderer = CardRenderer(generator.canvas, style_manager, resource_manager)
+    if args.incremental:
+        IncrementalBuilder(
+            output_file=output_file,
+            cache_dir=args.cache_dir,
+            logo_dpi=args.logo_dpi or None,
+            group_by_category=args.group_by_category,
+            imposition=imposition,
+            title=args.title,
+            subtitle=args.subtitle,
+            style_overrides=style_overrides,
+            **renderer_options,
+        ).build(card_data)
+        return
     
-    # Create the title page generator
-    title_page_generator = TitlePageGenerator(
-        generator.canvas, 
-        generator.page_width, 
-        generator.page_height, 
-        resource_manager,
-        card_renderer
+    if args.volume_pages or args.volume_mb:
+        try:
+            ShardedRenderer(
+                output_file=output_file,
+                pages_per_volume=args.volume_pages,
+                max_volume_bytes=args.volume_mb and int(args.volume_mb * 1024 * 1024),
+                title_pages=args.volume_title_pages,
+                workers=args.workers,
+                logo_dpi=args.logo_dpi or None,
+                invariant=args.invariant,
+                group_by_category=args.group_by_category,
+                imposition=imposition,
+                title=args.title,
+                subtitle=args.subtitle,
+                style_overrides=style_overrides,
+                **renderer_options,
+            ).generate_cards(card_data)
+        except ValueError as e:
+            # A page of cards too big for the volume size limit
+            sys.exit(f"Error: {e}")
+        return
+    
+    if args.workers:
+        ParallelRenderer(
+            output_file=output_file,
+            workers=args.workers,
+            logo_dpi=args.logo_dpi or None,
+            invariant=args.invariant,
+            group_by_category=args.group_by_category,
+            imposition=imposition,
+            title=args.title,
+            subtitle=args.subtitle,
+            style_overrides=style_overrides,
+            **renderer_options,
+        ).generate_cards(card_data)
+        return
+    
+    tracer = Tracer() if args.trace else NULL_TRACER
+    resource_manager = ResourceManager(
+        logo_path="insect_asylum_logo.png",
+        tracer=tracer,
+        logo_dpi=args.logo_dpi or None,
     )
     
-    # Generate the cards
-    generator.generate_cards(card_data, card_renderer, title_page_generator, style_manager)
+    # Fonts, the logo and a deck that has to be read up front load on a
+    # thread pool while rendering starts; each is waited for only when the
+    # drawing first needs it
+    with ThreadPoolExecutor() as preload_pool:
+        logo_sizes = []
+        if args.fidelity != "draft":
+            logo_sizes = [(TITLE_LOGO_SIZE, TITLE_LOGO_SIZE), (LOGO_SIZE, LOGO_SIZE)]
+        resource_manager.preload(preload_pool, logo_sizes)
+        # A compiled deck answers category queries without being loaded
+        deck_loading = None
+        if args.group_by_category and not card_data.is_compiled():
+            deck_loading = preload_pool.submit(card_data.load)
+        
+        style_manager = StyleManager.from_overrides(style_overrides)
+        
+        # Create the flashcard generator
+        generator = FlashcardGenerator(
+            output_file=output_file,
+            invariant=args.invariant,
+            group_by_category=args.group_by_category,
+            tracer=tracer,
+            streaming=args.streaming,
+            fidelity=args.fidelity,
+            imposition=imposition,
+            title_cache=TitlePageCache(),
+        )
+        
+        # Create the card renderer
+        card_renderer = CardRenderer(
+            generator.canvas,
+            style_manager,
+            resource_manager,
+            tracer=tracer,
+            **renderer_options,
+        )
+        
+        # Create the title page generator
+        title_page_generator = TitlePageGenerator(
+            generator.canvas, 
+            generator.page_width, 
+            generator.page_height, 
+            resource_manager,
+            card_renderer,
+            tracer=tracer,
+            title=args.title,
+            subtitle=args.subtitle,
+        )
+        
+        # Generate the cards
+        generator.generate_cards(
+            card_data, card_renderer, title_page_generator, style_manager, deck_loading
+        )
+    
+    if args.trace:
+        tracer.save(args.trace)
+        for stage, stats in tracer.summary().items():
+            print(f"  {stage:>18}: {stats['seconds']:8.3f}s over {stats['calls']} calls")
+        print(f"Trace saved to: {os.path.abspath(args.trace)}")
 
 if __name__ == "__main__":
     main()
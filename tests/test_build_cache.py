@@ -0,0 +1,142 @@
+import os
+import time
+
+import pytest
+
+from components import build_cache
+from components.build_cache import RENDER_MODULES, IncrementalBuilder
+from components.card_data import CardData
+from components.card_renderer import CardRenderer
+from components.flashcard_generator import FlashcardGenerator
+from components.font_cache import find_font_file
+from components.resource_manager import ResourceManager
+from components.title_page_generator import TitlePageGenerator
+
+CARDS = [
+    ("Insects", "How many legs does an insect have?"),
+    ("Plants", "Why are most leaves green?"),
+    ("Birds", "Which birds can fly backwards?"),
+]
+
+
+def fonts_available():
+    """Return whether every font the renderer needs can be found."""
+    try:
+        for font_file in ResourceManager.FONT_FILES.values():
+            find_font_file(font_file)
+    except OSError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not fonts_available(), reason="DejaVu fonts not found")
+
+
+def build(cache_dir, cards=CARDS, **options):
+    """Build a deck incrementally and return the pages rendered."""
+    builder = IncrementalBuilder(
+        output_file=os.path.join(cache_dir, "deck.pdf"),
+        cache_dir=cache_dir,
+        logo_dpi=None,
+        fidelity="draft",
+        **options,
+    )
+    return builder.build(CardData(cards))
+
+
+def render(builder, card_data):
+    """Render a deck in full, with the builder's settings and title cache."""
+    generator = FlashcardGenerator(
+        output_file=builder.output_file,
+        invariant=True,
+        imposition=builder.imposition,
+        title_cache=builder.title_cache,
+    )
+    card_renderer = CardRenderer(
+        generator.canvas,
+        builder.style_manager,
+        builder.resource_manager,
+        **builder.renderer_options,
+    )
+    title_page_generator = TitlePageGenerator(
+        generator.canvas,
+        generator.page_width,
+        generator.page_height,
+        builder.resource_manager,
+        card_renderer,
+        title=builder.title,
+        subtitle=builder.subtitle,
+    )
+    generator.generate_cards(
+        card_data, card_renderer, title_page_generator, builder.style_manager
+    )
+
+
+def best_time(run, repeat=3):
+    """Return the fastest of several timed calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def edit_module(monkeypatch, module_name):
+    """Make one components module hash as if its source had been edited."""
+    file_digest = build_cache.file_digest
+
+    def edited_digest(path):
+        digest = file_digest(path)
+        if os.path.basename(path) == module_name:
+            digest = f"edited-{digest}"
+        return digest
+
+    monkeypatch.setattr(build_cache, "file_digest", edited_digest)
+
+
+@pytest.mark.parametrize("module_name", ["style_manager.py", "imposition.py"])
+def test_layout_modules_are_fingerprinted(module_name):
+    assert module_name in RENDER_MODULES
+
+
+@pytest.mark.parametrize("module_name", RENDER_MODULES)
+def test_editing_a_render_module_invalidates_pages(tmp_path, monkeypatch, module_name):
+    cache_dir = str(tmp_path)
+    assert build(cache_dir) == 1
+    assert build(cache_dir) == 0
+
+    edit_module(monkeypatch, module_name)
+    assert build(cache_dir) == 1
+
+
+def test_stale_pages_are_evicted(tmp_path):
+    cache_dir = str(tmp_path)
+    pages_dir = os.path.join(cache_dir, "pages")
+    edited = [*CARDS[:-1], ("Birds", "Which birds can swim underwater?")]
+    assert build(cache_dir, max_cache_bytes=0) == 1
+    assert build(cache_dir, edited, max_cache_bytes=0) == 1
+
+    # With no room to spare, only the page the last build used is kept
+    assert len(os.listdir(pages_dir)) == 1
+    assert build(cache_dir, edited, max_cache_bytes=0) == 0
+    assert build(cache_dir, max_cache_bytes=0) == 1
+
+
+def test_cached_rebuild_is_faster_than_a_full_render(tmp_path):
+    builder = IncrementalBuilder(
+        output_file=str(tmp_path / "deck.pdf"), cache_dir=str(tmp_path)
+    )
+    # Numbered copies of the cards, so no two pages are the same
+    card_data = CardData(
+        [
+            (category, f"{question} ({i})")
+            for i in range(20)
+            for category, question in CARDS
+        ]
+    )
+    builder.build(card_data)
+
+    rebuild_time = best_time(lambda: builder.build(card_data))
+    render_time = best_time(lambda: render(builder, card_data))
+    assert rebuild_time < render_time
@@ -0,0 +1,49 @@
+from components.card_data import CardData
+from components.compiled_deck import CompiledDeck
+
+CARDS = [
+    ("Insects", "How many legs does an insect have?"),
+    ("Plants", "Why are most leaves green?"),
+    ("Insects", "Why do moths fly towards lights?"),
+]
+
+
+def check_category_queries(card_data):
+    assert card_data.get_category_counts() == {"Insects": 2, "Plants": 1}
+    assert card_data.get_categories() == {"Insects", "Plants"}
+    assert card_data.has_category("Plants")
+    assert not card_data.has_category("Birds")
+    assert card_data.get_category_count("Insects") == 2
+    assert card_data.get_category_count("Birds") == 0
+    assert list(card_data.iter_by_category()) == [CARDS[0], CARDS[2], CARDS[1]]
+
+
+def test_counts_follow_added_cards():
+    card_data = CardData([])
+    card_data.load().add_cards(CARDS)
+    check_category_queries(card_data)
+
+    card_data.add_card("Birds", "Which birds can fly backwards?")
+    assert card_data.get_category_count("Birds") == 1
+
+
+def test_streamed_deck_is_indexed_once():
+    reads = []
+
+    class Source:
+        def __iter__(self):
+            reads.append(1)
+            return iter(CARDS)
+
+    card_data = CardData(Source())
+    check_category_queries(card_data)
+    assert len(reads) == 1
+
+
+def test_compiled_deck_counts_are_stored(tmp_path):
+    path = str(tmp_path / "cards.deck")
+    CardData(CARDS).compile(path)
+    with CompiledDeck(path) as deck:
+        card_data = CardData(deck)
+        assert card_data.category_counts == {"Insects": 2, "Plants": 1}
+        check_category_queries(card_data)
@@ -0,0 +1,38 @@
+from reportlab.lib import colors
+from reportlab.pdfgen import canvas
+
+from components.card_renderer import CardRenderer, can_reuse_shadings
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+
+START = colors.HexColor("#A8E6CF")
+END = colors.HexColor("#3D8B6E")
+
+
+def make_renderer(tmp_path):
+    """Return a CardRenderer drawing on a fresh canvas."""
+    page = canvas.Canvas(str(tmp_path / "page.pdf"))
+    return CardRenderer(page, StyleManager(), ResourceManager(logo_dpi=None))
+
+
+def test_gradients_share_one_shading_per_color_pair(tmp_path):
+    renderer = make_renderer(tmp_path)
+    renderer.draw_gradient_background(0, 0, 100, 50, START, END)
+    renderer.draw_gradient_background(0, 60, 100, 50, START, END)
+
+    shadings = [line for line in renderer.canvas._code if line.endswith(" sh")]
+    assert len(shadings) == 2
+    assert len(set(shadings)) == 1
+    assert len(renderer.gradient_shadings) == 1
+
+
+def test_gradients_fall_back_to_bands_without_canvas_internals(tmp_path):
+    renderer = make_renderer(tmp_path)
+    del renderer.canvas._shadingUsed
+    assert not can_reuse_shadings(renderer.canvas)
+
+    renderer.draw_gradient_background(0, 0, 100, 50, START, END, steps=15)
+    code = renderer.canvas._code
+    assert not any(line.endswith(" sh") for line in code)
+    assert sum(" re f" in line for line in code) == 15
+    assert not renderer.gradient_shadings
@@ -0,0 +1,35 @@
+from components.compiled_deck import CompiledDeck, compile_deck
+
+CARDS = [
+    ("Insects", "How many legs?"),
+    ("Plants", "Why are leaves green?"),
+    ("Insects", "Do ants sleep?"),
+    ("Fungi", "Is a mushroom a plant?"),
+    ("Plants", "What do roots do? 🌱"),
+]
+
+
+def test_category_index(tmp_path):
+    path = str(tmp_path / "cards.deck")
+    assert compile_deck(CARDS, path) == len(CARDS)
+    with CompiledDeck(path) as deck:
+        assert list(deck) == CARDS
+        assert deck.get_category_counts() == {"Insects": 2, "Plants": 2, "Fungi": 1}
+        assert list(deck.iter_category("Plants")) == [CARDS[1], CARDS[4]]
+        assert list(deck.iter_category("Nope")) == []
+        assert list(deck.iter_by_category()) == [
+            CARDS[0],
+            CARDS[2],
+            CARDS[1],
+            CARDS[4],
+            CARDS[3],
+        ]
+
+
+def test_empty_deck(tmp_path):
+    path = str(tmp_path / "empty.deck")
+    compile_deck([], path)
+    with CompiledDeck(path) as deck:
+        assert len(deck) == 0
+        assert deck.get_category_counts() == {}
+        assert list(deck.iter_by_category()) == []
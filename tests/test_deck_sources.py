@@ -0,0 +1,72 @@
+import pytest
+
+from components.deck_sources import CsvDeckSource, JsonlDeckSource
+
+
+def read_csv(tmp_path, text, encoding="utf-8"):
+    """Write text to a CSV deck and return the cards read from it."""
+    path = tmp_path / "deck.csv"
+    path.write_text(text, encoding=encoding)
+    return list(CsvDeckSource(str(path)))
+
+
+def read_jsonl(tmp_path, *lines):
+    """Write lines to a JSONL deck and return the cards read from it."""
+    path = tmp_path / "deck.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return list(JsonlDeckSource(str(path)))
+
+
+def test_reads_arrays_and_objects(tmp_path):
+    cards = read_jsonl(
+        tmp_path,
+        '["Insects", "How many legs?"]',
+        "",
+        '{"category": "Plants", "question": "Why green?", "notes": "extra"}',
+    )
+    assert cards == [("Insects", "How many legs?"), ("Plants", "Why green?")]
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        '"ab"',
+        "[1, 2]",
+        '["Insects"]',
+        '["Insects", "How many legs?", "extra"]',
+        '["Insects", null]',
+        '{"category": "Insects"}',
+        '{"category": "Insects", "question": 7}',
+        "42",
+    ],
+)
+def test_rejects_records_that_are_not_cards(tmp_path, record):
+    with pytest.raises(ValueError, match=r"deck\.jsonl:2: expected a \[category"):
+        read_jsonl(tmp_path, '["Insects", "How many legs?"]', record)
+
+
+def test_reports_invalid_json_with_its_line(tmp_path):
+    with pytest.raises(ValueError, match=r"deck\.jsonl:1: invalid JSON"):
+        read_jsonl(tmp_path, '["Insects", ')
+
+
+def test_csv_header_picks_columns(tmp_path):
+    cards = read_csv(tmp_path, "id,question,category\n1,How many legs?,Insects\n")
+    assert cards == [("Insects", "How many legs?")]
+
+
+def test_csv_without_header_uses_first_two_columns(tmp_path):
+    cards = read_csv(tmp_path, "Insects,How many legs?\nPlants,Why green?\n")
+    assert cards == [("Insects", "How many legs?"), ("Plants", "Why green?")]
+
+
+def test_csv_header_after_byte_order_mark(tmp_path):
+    cards = read_csv(
+        tmp_path, "category,question\r\nInsects,How many legs?\r\n", "utf-8-sig"
+    )
+    assert cards == [("Insects", "How many legs?")]
+
+
+def test_csv_header_after_blank_lines(tmp_path):
+    cards = read_csv(tmp_path, "\n , \ncategory,question\nInsects,How many legs?\n")
+    assert cards == [("Insects", "How many legs?")]
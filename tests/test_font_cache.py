@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from components.font_cache import FontMetricsCache, find_font_file
+
+
+def find_font():
+    """Return the path of DejaVuSans.ttf, or None if it cannot be found."""
+    try:
+        return find_font_file("DejaVuSans.ttf")
+    except OSError:
+        return None
+
+
+FONT_PATH = find_font()
+
+pytestmark = pytest.mark.skipif(FONT_PATH is None, reason="DejaVu fonts not found")
+
+
+def test_cached_metrics_restore_the_font(tmp_path):
+    cache = FontMetricsCache(str(tmp_path))
+    parsed = cache.load_font("CacheTestSans", FONT_PATH)
+    (cache_file,) = os.listdir(tmp_path)
+    assert cache_file.endswith(".marshal")
+    # The font file's bytes are read again rather than stored
+    assert os.path.getsize(tmp_path / cache_file) < os.path.getsize(FONT_PATH)
+
+    restored = cache.load_font("CacheTestSans", FONT_PATH)
+    assert restored is not parsed
+    assert restored.face.name == parsed.face.name
+    assert restored.face.charWidths == parsed.face.charWidths
+    assert restored.face.bbox == parsed.face.bbox
+    text = "How many legs does an insect have?"
+    assert restored.stringWidth(text, 12) == parsed.stringWidth(text, 12)
+
+    # Subsetting reads the glyphs from the font file itself
+    subset = [0] + sorted(set(map(ord, text)))
+    assert restored.face.makeSubset(subset) == parsed.face.makeSubset(subset)
+
+
+def test_unreadable_cache_is_ignored(tmp_path, capsys):
+    cache = FontMetricsCache(str(tmp_path))
+    cache.load_font("CacheTestSans", FONT_PATH)
+    (cache_file,) = os.listdir(tmp_path)
+    (tmp_path / cache_file).write_bytes(b"not marshal data")
+
+    font = cache.load_font("CacheTestSans", FONT_PATH)
+    assert font.face.charWidths
+    assert "Ignoring unreadable font cache" in capsys.readouterr().out
@@ -0,0 +1,54 @@
+import pytest
+from reportlab.pdfgen import canvas
+
+from components.font_cache import find_font_file
+from components.pdf_merge import merge_pdfs
+from components.resource_manager import ResourceManager
+
+pypdf = pytest.importorskip("pypdf")
+
+FONTS = ["DejaVuSans", "DejaVuSerif"]
+
+
+def fonts_available():
+    """Return whether the fonts the test pages use can be found."""
+    try:
+        for font_name in FONTS:
+            find_font_file(ResourceManager.FONT_FILES[font_name])
+    except OSError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not fonts_available(), reason="DejaVu fonts not found")
+
+
+def write_page(path, font_names):
+    """Write a one-page PDF that uses fonts in the given order."""
+    resource_manager = ResourceManager(logo_dpi=None)
+    page = canvas.Canvas(str(path))
+    for i, font_name in enumerate(font_names):
+        page.setFont(resource_manager.get_font(font_name), 12)
+        page.drawString(72, 720 - i * 20, "How many legs does an insect have?")
+    page.save()
+    return str(path)
+
+
+def test_merged_chunks_share_fonts(tmp_path):
+    # The chunks use the fonts in different orders, so reportlab gives the
+    # same font a different internal name in each
+    input_files = [
+        write_page(tmp_path / "a.pdf", FONTS),
+        write_page(tmp_path / "b.pdf", FONTS[::-1]),
+    ]
+    output_file = str(tmp_path / "merged.pdf")
+    merge_pdfs(input_files, output_file)
+
+    reader = pypdf.PdfReader(output_file)
+    font_objects = {}
+    for page in reader.pages:
+        for font in page["/Resources"]["/Font"].values():
+            font_objects[font.idnum] = font.get_object()["/BaseFont"]
+    assert len(reader.pages) == 2
+    # One object per font, which includes reportlab's default Helvetica
+    assert len(font_objects) == len(set(font_objects.values()))
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+from components.render_service import (
+    RenderService,
+    RequestError,
+    parse_render_request,
+)
+
+
+def parse(styles):
+    """Parse a one-card render request with some style overrides."""
+    return parse_render_request(
+        json.dumps({"cards": [["Insects", "How many legs?"]], "styles": styles})
+    )
+
+
+@pytest.mark.parametrize(
+    "styles, message",
+    [
+        ({"typography": {"Insects": {"header_font": "Nope"}}}, "Unknown font"),
+        ({"typography": {"Plants": {"question_font": "Nope"}}}, "Unknown font"),
+        ({"card_width": 20}, "does not fit"),
+        ({"colors": {"Insects": {"header": "not-a-color"}}}, "color"),
+        ({"colors": {"Insects": {"header": [2, 0, 0]}}}, "color component"),
+        ({"colors": {"Insects": {"header": [0, 0]}}}, "3 or 4 components"),
+        ({"colors": {"Insects": {"glow": "red"}}}, "Unknown color"),
+        ({"colors": {"Insects": "red"}}, "colors must map"),
+        ({"typography": {"Insects": {"header_size": "big"}}}, "header_size"),
+        ({"typography": {"Insects": {"question_size": -4}}}, "question_size"),
+        ({"typography": {"Insects": {"question_size": True}}}, "question_size"),
+        ({"typography": {"Insects": {"header_font": 7}}}, "Invalid font"),
+        ({"typography": {"Insects": {"kerning": 2}}}, "Unknown typography"),
+        ({"card_width": "wide"}, "card_width"),
+        ({"card_height": 0}, "card_height"),
+        ({"header_height": 5}, "header_height"),
+        (["card_width", 3], "must be an object"),
+    ],
+)
+def test_bad_styles_are_client_errors(styles, message):
+    with pytest.raises(RequestError, match=message) as raised:
+        parse(styles)
+    assert raised.value.status == 400
+
+
+def test_valid_styles_are_accepted():
+    job = parse(
+        {"card_width": 3, "typography": {"Insects": {"header_font": "DejaVuSerif"}}}
+    )
+    assert job["cards"] == [("Insects", "How many legs?")]
+
+
+@pytest.mark.parametrize("length", ["-5", "ten"])
+def test_bad_content_length_is_rejected(length):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(
+            f"POST /render HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+        )
+        reader.feed_eof()
+        return await RenderService().read_request(reader)
+
+    with pytest.raises(RequestError, match="Invalid Content-Length") as raised:
+        asyncio.run(read())
+    assert raised.value.status == 400
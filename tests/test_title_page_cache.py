@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from components.card_data import CardData
+from components.card_renderer import CardRenderer
+from components.flashcard_generator import FlashcardGenerator
+from components.font_cache import find_font_file
+from components.resource_manager import ResourceManager
+from components.style_manager import StyleManager
+from components.title_page_cache import TitlePageCache
+from components.title_page_generator import TitlePageGenerator
+
+CARDS = [
+    ("Insects", "How many legs does an insect have?"),
+    ("Plants", "Why are most leaves green?"),
+]
+
+
+def fonts_available():
+    """Return whether every font the renderer needs can be found."""
+    try:
+        for font_file in ResourceManager.FONT_FILES.values():
+            find_font_file(font_file)
+    except OSError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(not fonts_available(), reason="DejaVu fonts not found")
+
+
+def generate(title_cache):
+    """Generate the test deck with a title cache and return the PDF's bytes."""
+    output = io.BytesIO()
+    generator = FlashcardGenerator(
+        output_file=output, invariant=True, title_cache=title_cache
+    )
+    resource_manager = ResourceManager(logo_dpi=None)
+    style_manager = StyleManager()
+    card_renderer = CardRenderer(generator.canvas, style_manager, resource_manager)
+    title_page_generator = TitlePageGenerator(
+        generator.canvas,
+        generator.page_width,
+        generator.page_height,
+        resource_manager,
+        card_renderer,
+    )
+    generator.generate_cards(
+        CardData(CARDS), card_renderer, title_page_generator, style_manager
+    )
+    return output.getvalue()
+
+
+def test_title_page_is_drawn_from_the_cache_as_a_form(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path)
+    first = generate(TitlePageCache(cache_dir))
+    assert b"/FormXob.TitlePage" in first
+
+    def redraw(*args):
+        raise AssertionError("the title page was drawn again")
+
+    # A new cache in the same directory reads the stored capture back
+    monkeypatch.setattr(TitlePageCache, "_capture_title_page", redraw)
+    assert generate(TitlePageCache(cache_dir)) == first